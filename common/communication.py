@@ -1,5 +1,6 @@
 import logging
 import asyncio
+import inspect
 import socket
 
 # Use the centralized logger instead of debug_utils
@@ -38,7 +39,7 @@ class Communication:
                 return False
                 
             # Log raw message for debugging
-            self.logger.debug(f"Processing message: '{message}'")
+            self.logger.debug("Processing message: '%s'", message)
             
             # Split into command and arguments
             parts = message.split('|')
@@ -47,7 +48,7 @@ class Communication:
             
             # Handle the command
             if command in self.commands:
-                self.logger.debug(f"Handling command: {command} with args: {args}")
+                self.logger.debug("Handling command: %s with args: %s", command, args)
                 self.commands[command](*args)
                 return True
             else:
@@ -59,9 +60,12 @@ class Communication:
 
     async def handle_async_command(self, message, writer):
         try:
-            self.logger.debug(f"Handling command: {message}")
-            # Use the centralized logger's method for message dumping
-            Logger.dump_message_info(self.logger, message)
+            # Per-message debug output is only built when DEBUG is actually enabled
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                self.logger.debug("Handling command: %s", message)
+                # Use the centralized logger's method for message dumping
+                Logger.dump_message_info(self.logger, message)
             
             # Parse command and arguments
             parts = message.split('|')
@@ -75,25 +79,28 @@ class Communication:
             # Find handler
             handler = self.commands.get(command)
             if handler:
-                self.logger.debug(f"Found handler for command: {command} -> {handler.__name__}")
+                if debug:
+                    self.logger.debug("Found handler for command: %s -> %s", command, handler.__name__)
                 try:
-                    await handler(writer, *args)
-                    self.logger.debug(f"Handler {handler.__name__} executed successfully")
+                    # Handlers that never suspend can be plain functions and
+                    # complete inline without creating a coroutine object
+                    result = handler(writer, *args)
+                    if inspect.isawaitable(result):
+                        await result
+                    if debug:
+                        self.logger.debug("Handler %s executed successfully", handler.__name__)
                     return True
                 except Exception as e:
-                    self.logger.error(f"Error executing handler {handler.__name__}: {e}")
-                    import traceback
-                    self.logger.error(traceback.format_exc())
+                    self.logger.exception("Error executing handler %s: %s", handler.__name__, e)
                     return False
             else:
                 self.logger.warning(f"No handler found for command: {command}")
-                self.logger.debug(f"Available commands: {list(self.commands.keys())}")
+                if debug:
+                    self.logger.debug("Available commands: %s", list(self.commands.keys()))
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Error handling command: {e}")
-            import traceback
-            self.logger.error(traceback.format_exc())
+            self.logger.exception("Error handling command: %s", e)
             return False
     
     def has_complete_message(self):
@@ -121,13 +128,17 @@ class Communication:
             return False
 
     async def send_message_async(self, writer, message):
-        """Send a message asynchronously with proper termination"""
+        """Send a message (str, or bytes already encoded) asynchronously with proper termination"""
         try:
             if writer:
                 # Ensure message ends with a newline to mark message boundary
-                if not message.endswith('\n'):
-                    message += '\n'
-                writer.write(message.encode('utf-8'))
+                if isinstance(message, str):
+                    if not message.endswith('\n'):
+                        message += '\n'
+                    message = message.encode('utf-8')
+                elif not message.endswith(b'\n'):
+                    message += b'\n'
+                writer.write(message)
                 await writer.drain()
                 return True
             else:
@@ -137,6 +148,20 @@ class Communication:
             self.logger.error(f"Send error: {e}")
             return False
 
+    async def send_bytes_async(self, writer, data: bytes):
+        """Send an already encoded, newline terminated message asynchronously"""
+        try:
+            if writer:
+                writer.write(data)
+                await writer.drain()
+                return True
+            else:
+                self.logger.warning(f"Cannot send message - writer is None: {data!r}")
+                return False
+        except Exception as e:
+            self.logger.error(f"Send error: {e}")
+            return False
+
     def send_all_message(self, writers: list[socket.socket], message):
         """Envía un mensaje de manera sincrónica a todos los destinatarios."""
         for writer in writers:
@@ -162,17 +187,17 @@ class Communication:
                 # Add to buffer
                 decoded_data = data.decode('utf-8')
                 self.buffer += decoded_data
-                self.logger.debug(f"Added {len(decoded_data)} bytes to buffer. Buffer now contains {len(self.buffer)} bytes")
+                self.logger.debug("Added %d bytes to buffer. Buffer now contains %d bytes", len(decoded_data), len(self.buffer))
             
             # Check if we have a complete message
             if '\n' in self.buffer:
                 # Split at first newline
                 message, self.buffer = self.buffer.split('\n', 1)
-                self.logger.debug(f"Extracted complete message: '{message}', remaining buffer: {len(self.buffer)} bytes")
+                self.logger.debug("Extracted complete message: '%s', remaining buffer: %d bytes", message, len(self.buffer))
                 return True, message
             
             # We don't have a complete message yet, wait for more data
-            self.logger.debug(f"No complete message yet, buffer contains {len(self.buffer)} bytes")
+            self.logger.debug("No complete message yet, buffer contains %d bytes", len(self.buffer))
             return True, None  # Only return complete messages, not partial ones
         except Exception as e:
             self.logger.error(f"Receive error: {e}")
@@ -86,11 +86,12 @@ class Logger:
             source: Source of the message
             message: Message content
         """
-        if isinstance(logger, logging.Logger):
-            logger.debug(f"<< FROM {source}: {message}")
-        else:
+        if not isinstance(logger, logging.Logger):
             # If a logging module was passed instead of a logger
-            logging.getLogger("LogHelper").debug(f"<< FROM {source}: {message}")
+            logger = logging.getLogger("LogHelper")
+        # Message traffic is DEBUG only: skip the formatting entirely otherwise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("<< FROM %s: %s", source, message)
     
     @staticmethod
     def log_outgoing(logger, destination, message):
@@ -102,11 +103,12 @@ class Logger:
             destination: Destination of the message
             message: Message content
         """
-        if isinstance(logger, logging.Logger):
-            logger.debug(f">> TO {destination}: {message}")
-        else:
+        if not isinstance(logger, logging.Logger):
             # If a logging module was passed instead of a logger
-            logging.getLogger("LogHelper").debug(f">> TO {destination}: {message}")
+            logger = logging.getLogger("LogHelper")
+        # Message traffic is DEBUG only: skip the formatting entirely otherwise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(">> TO %s: %s", destination, message)
     
     @staticmethod
     def log_system(logger, message):
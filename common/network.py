@@ -15,7 +15,48 @@ class NetworkManager:
             return True
         except Exception:
             return False
-    
+
+    @staticmethod
+    def enable_keepalive(sock, idle=30, interval=10, count=3):
+        """
+        Activa TCP keepalive en un socket ya conectado para detectar pares caídos.
+        Las opciones finas (TCP_KEEPIDLE, TCP_KEEPINTVL, TCP_KEEPCNT, TCP_USER_TIMEOUT)
+        solo existen en Linux; en otras plataformas se aplica únicamente SO_KEEPALIVE.
+        """
+        if sock is None:
+            return False
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+            if hasattr(socket, 'TCP_KEEPINTVL'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+            if hasattr(socket, 'TCP_KEEPCNT'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+            if hasattr(socket, 'TCP_USER_TIMEOUT'):
+                # Datos sin confirmar durante más tiempo que el keepalive completo cierran la conexión
+                timeout_ms = (idle + interval * count) * 1000
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, timeout_ms)
+            return True
+        except OSError as e:
+            logger.warning(f"No se pudo configurar keepalive: {e}")
+            return False
+
+    @staticmethod
+    def enable_nodelay(sock):
+        """
+        Desactiva el algoritmo de Nagle: las respuestas cortas salen al momento
+        en lugar de esperar a juntarse con datos posteriores.
+        """
+        if sock is None:
+            return False
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return True
+        except OSError as e:
+            logger.warning(f"No se pudo configurar TCP_NODELAY: {e}")
+            return False
+
     @staticmethod
     def create_server_socket(port, hostname=None):
         """Crea un socket para servidor que soporte IPv6 si está disponible, o IPv4 en caso contrario."""
@@ -2,23 +2,67 @@ import os
 import abc
 import socket
 import asyncio
+import inspect
 import logging
-from queue import Empty, Queue
+from queue import Queue, Empty
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
 
 from common.social import MainServerMessages as SM
 from common.social import ServerClientMessages as SCM
 from common.logger import Logger
 from common.network import NetworkManager
 
+# Límite alto del búfer de escritura de cada cliente: los broadcasts escriben sin
+# esperar a drain(), así que el transporte debe poder acumular sin pausarse
+WRITE_BUFFER_HIGH = 2 ** 20
+
+# Límite del búfer de lectura de cada cliente: ninguna línea puede superarlo
+READ_LIMIT = 64 * 1024
+
+
+def client_label(client_id):
+    """Forma legible "host:port" de un id de cliente, sólo para logs y nombres por defecto"""
+    if isinstance(client_id, tuple):
+        return "%s:%d" % client_id[:2]
+    return str(client_id)
+
+
+@dataclass(slots=True)
+class ClientConn:
+    """Conexión de un cliente al servidor de juego"""
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_activity: float
+    disconnected: bool = False
+
+
+class PlayerStates:
+    """Estados de un jugador en el puzzle actual; None mientras no ha respondido"""
+    CORRECT = "correct"
+    SURRENDERED = "surrendered"
+
+
+@dataclass(slots=True)
+class PlayerState:
+    """Jugador de la partida y su estado en el puzzle actual (None o uno de PlayerStates)"""
+    username: str
+    state: str | None = None
+
+
 class AbstractGameServer(abc.ABC):
     """Abstract base class for different game server types"""
     
-    def __init__(self, name, port, puzzle_queue: Queue, message_queue: Queue, debug=False):
+    def __init__(self, name, port, puzzle_queue: Queue, message_queue: Connection, debug=False):
         self.name = name
         self.port = port
         self.puzzle_queue = puzzle_queue
         self.message_queue = message_queue
-        self.clients = {}  # Track connected clients {client_id: {reader, writer, last_activity}}
+        self.pid = os.getpid()  # Identifica a este servidor en los mensajes al MainServer
+        self.clients = {}  # Track connected clients {(host, port): ClientConn}
+        self.client_ids = {}  # {writer: (host, port)}, fijado al conectar: el peername no cambia
+        self.active_clients = {}  # Vista de self.clients sin los marcados como desconectados
+        self.byte_commands = {}  # {b"comando": handler}, despacho directo sobre los bytes leídos
         self.current_puzzle = list()
         self.debug_enabled = debug
         
@@ -60,7 +104,8 @@ class AbstractGameServer(abc.ABC):
             # Convertir a asyncio server
             self.server = await asyncio.start_server(
                 self.handle_client_connection,
-                sock=sock
+                sock=sock,
+                limit=READ_LIMIT
             )
             
             # Inicializar puzzles
@@ -74,6 +119,26 @@ class AbstractGameServer(abc.ABC):
             self.logger.error(f"Error starting server: {e}")
             raise
 
+    @property
+    def active_count(self):
+        """Clientes conectados que no están marcados como desconectados"""
+        return len(self.active_clients)
+
+    @property
+    def current_puzzle(self):
+        """Puzzle en juego: 4 cartas y el objetivo al final"""
+        return self._current_puzzle
+
+    @current_puzzle.setter
+    def current_puzzle(self, puzzle):
+        # Cartas, objetivo y mensajes se preparan una vez por puzzle, no en cada
+        # solución recibida ni en cada envío
+        self._current_puzzle = puzzle
+        self.puzzle_cards = sorted(puzzle[:4]) if puzzle else []  # Ordenadas: se comparan como multiconjunto
+        self.puzzle_target = puzzle[-1] if puzzle else None
+        self.puzzle_b = f"{SCM.PUZZLE}|{puzzle}\n".encode()
+        self.new_puzzle_b = f"{SCM.NEW_PUZZLE}|{puzzle}\n".encode()
+
     def enable_debug(self):
         """Enable debug mode"""
         if not self.debug_enabled:
@@ -109,10 +174,16 @@ class AbstractGameServer(abc.ABC):
     
     async def handle_client_connection(self, reader, writer):
         """Handle a client connection"""
-        addr = writer.get_extra_info('peername')
-        client_id = f"{addr[0]}:{addr[1]}"
+        # El peername ya es una tupla (host, port[, ...]) hashable: sirve de clave tal cual
+        client_id = writer.get_extra_info('peername')
+        self.client_ids[writer] = client_id
         
-        self.logger.info(f"New client connected: {client_id}")
+        self.logger.info("New client connected: %s", client_label(client_id))
+        # Los mensajes de juego son líneas cortas: enviarlas sin esperar a Nagle.
+        # El límite de escritura se mantiene alto, no en 0: los broadcasts no esperan
+        # a drain() y con 0 cualquier byte pendiente pausaría el transporte
+        NetworkManager.enable_nodelay(writer.get_extra_info('socket'))
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
         
         # Desactivar temporizador de inactividad si es el primer cliente
         if self.idle_timer_active and len(self.clients) == 0:
@@ -120,27 +191,20 @@ class AbstractGameServer(abc.ABC):
             self.idle_timer_active = False
         
         # Añadir cliente a la estructura de seguimiento
-        self.clients[client_id] = {
-            "reader": reader,
-            "writer": writer,
-            "last_activity": asyncio.get_event_loop().time(),
-            "disconnected": False
-        }
+        self.clients[client_id] = self.active_clients[client_id] = ClientConn(reader, writer, asyncio.get_event_loop().time())
         
-        # Inicializar player con estado vacío
-        if client_id not in self.players:
-            self.players[client_id] = {"username": client_id, "state": None}
+        # Inicializar player con estado vacío (también si el id ya se usó antes)
+        self.players[client_id] = PlayerState(client_label(client_id))
         
         # Enviar el puzzle actual al nuevo cliente
         if self.current_puzzle:
-            await asyncio.sleep(0.5)
-            await self.comm.send_message_async(writer, f"{SCM.NEW_PUZZLE}|{self.current_puzzle}\n")
+            await self.comm.send_bytes_async(writer, self.new_puzzle_b)
         
         # CORREGIDO: Notificar al servidor principal con manejo de errores
         try:
             if hasattr(self, 'message_queue') and self.message_queue:
                 try:
-                    self.message_queue.put_nowait(f"{SM.PLAYER_JOIN}|{os.getpid()}")
+                    self.message_queue.send(f"{SM.PLAYER_JOIN}|{self.pid}")
                 except Exception as e:
                     self.logger.warning(f"Could not notify main server of player join: {e}")
         except Exception as e:
@@ -154,24 +218,43 @@ class AbstractGameServer(abc.ABC):
     
     async def handle_player_message(self, reader, writer, client_id):
         """Handle a message from a player"""
+        get_handler = self.byte_commands.get
         try:
             while not writer.is_closing():
                 try:
-                    data = await asyncio.wait_for(reader.readline(), timeout=1.0)
-                    if not data:  # Connection closed
-                        break
+                    # Una línea por comando: si se cierra el writer desde otro sitio,
+                    # la lectura termina sola, sin necesidad de un timeout de sondeo
+                    try:
+                        data = await reader.readuntil(b"\n")
+                    except asyncio.IncompleteReadError as e:
+                        data = e.partial  # Connection closed: process a last unterminated command, if any
+                        if not data:
+                            break
                         
-                    message = data.decode('utf-8').strip()
-                    if message:
-                        self.logger.debug(f"Received from {client_id}: {message}")
-                        await self.comm.handle_async_command(message, writer)
+                    line = data.strip()
+                    if line:
+                        self.logger.debug("Received from %s: %r", client_id, line)
+                        # "comando|arg|arg...": el comando se busca sin decodificarlo,
+                        # sólo los argumentos pasan a str
+                        command, sep, rest = line.partition(b"|")
+                        handler = get_handler(command.strip())
+                        if handler is None:
+                            # Comandos sin entrada directa: el despacho genérico los registra
+                            await self.comm.handle_async_command(line.decode('utf-8', 'replace'), writer)
+                        else:
+                            try:
+                                result = handler(writer, *rest.decode('utf-8', 'replace').split('|')) if sep else handler(writer)
+                                if inspect.isawaitable(result):
+                                    await result
+                            except Exception as e:
+                                self.logger.exception("Error executing handler %s: %s", handler.__name__, e)
+
+                    client_data = self.clients.get(client_id)
+                    if client_data is None:
+                        break  # The command was PLAYER_EXIT, which already removed the client
                         
                     # Actualizar timestamp de última actividad
-                    self.clients[client_id]["last_activity"] = asyncio.get_event_loop().time()
-                        
-                except asyncio.TimeoutError:
-                    # Esto es normal, solo verificar si el cliente sigue conectado
-                    continue
+                    client_data.last_activity = asyncio.get_running_loop().time()
                 except Exception as e:
                     self.logger.error(f"Error processing client message: {e}")
                     break
@@ -179,10 +262,9 @@ class AbstractGameServer(abc.ABC):
             self.logger.error(f"Error in client connection handler: {e}")
         finally:
             # Cleanup when client disconnects
-            if client_id in self.clients:
-                self.clients[client_id]["disconnected"] = True
+            self.mark_client_disconnected(client_id)
                 
-            self.logger.info(f"Client disconnected: {client_id}")
+            self.logger.info("Client disconnected: %s", client_label(client_id))
             try:
                 writer.close()
                 await writer.wait_closed()
@@ -191,7 +273,20 @@ class AbstractGameServer(abc.ABC):
                 
             # Process player exit
             await self.handle_player_exit(writer)
+            self.client_ids.pop(writer, None)
+        
         
+    def mark_client_disconnected(self, client_id):
+        """Mark a client as disconnected and take it out of active_clients
+
+        Returns False if the client is unknown or was already marked. Must not be
+        called while iterating over active_clients.
+        """
+        client_data = self.active_clients.pop(client_id, None)
+        if client_data is None:
+            return False
+        client_data.disconnected = True
+        return True
         
     @abc.abstractmethod
     async def broadcast_message(self, message):
@@ -199,19 +294,23 @@ class AbstractGameServer(abc.ABC):
         pass
         
     def get_next_puzzle(self):
-        """Get the next puzzle from the queue or generate one if needed"""
+        """Get the next puzzle from the queue or generate one if needed
+
+        Never waits: it runs on the event loop, and the MainServer keeps the queue
+        topped up (each OK asks it for one more puzzle).
+        """
         try:
-            if not self.puzzle_queue.empty():
-                next_puzzle = self.puzzle_queue.get()
-                self.message_queue.put(f"{SM.OK}|{os.getpid()}")
-                self.logger.info(f"Got new puzzle from queue: {next_puzzle}")
-                return next_puzzle
-            else:
+            try:
+                next_puzzle = self.puzzle_queue.get_nowait()
+            except Empty:
                 self.logger.warning("Puzzle queue empty, generating a random puzzle")
                 # Import here to avoid circular imports
                 random_puzzle = [4,7,3,6,2]
                 self.logger.info(f"Generated random puzzle: {random_puzzle}")
                 return random_puzzle
+            self.message_queue.send(f"{SM.OK}|{self.pid}")
+            self.logger.info(f"Got new puzzle from queue: {next_puzzle}")
+            return next_puzzle
         except Exception as e:
             self.logger.error(f"Error getting next puzzle: {e}")
             return None
@@ -227,14 +326,11 @@ class AbstractGameServer(abc.ABC):
             # Solo continuar si el temporizador sigue activo
             if self.idle_timer_active:
                 # Verificar si hay jugadores activos
-                active_clients = {cid: data for cid, data in self.clients.items() 
-                                if not data.get("disconnected", False)}
-                
-                if not active_clients:
+                if not self.active_count:
                     self.logger.info("No players joined within 60 seconds. Auto-shutting down server.")
-                    self.message_queue.put(f"{SM.KILL_SERVER}|{os.getpid()}")
+                    self.message_queue.send(f"{SM.KILL_SERVER}|{self.pid}")
                 else:
-                    self.logger.info(f"Players have joined ({len(active_clients)}). Server will continue running.")
+                    self.logger.info(f"Players have joined ({self.active_count}). Server will continue running.")
                     self.idle_timer_active = False
                     
                     # Iniciar verificación periódica de clientes
@@ -255,18 +351,19 @@ class AbstractGameServer(abc.ABC):
                 now = asyncio.get_event_loop().time()
                 inactive_timeout = 120  # 2 minutos sin actividad
                 
-                for client_id, client_data in list(self.clients.items()):
+                # Sin copia: marcar y cerrar no cambia el tamaño de self.clients (las bajas
+                # las hace handle_player_exit cuando la conexión termina, fuera de este bucle)
+                for client_id, client_data in self.clients.items():
                     # Si el cliente ya está marcado como desconectado, ignorarlo
-                    if client_data.get("disconnected", False):
+                    if client_data.disconnected:
                         continue
                         
                     # Verificar si el cliente ha estado inactivo demasiado tiempo
-                    last_activity = client_data.get("last_activity", 0)
-                    if now - last_activity > inactive_timeout:
-                        self.logger.warning(f"Client {client_id} inactive for too long, marking as disconnected")
-                        self.clients[client_id]["disconnected"] = True
+                    if now - client_data.last_activity > inactive_timeout:
+                        self.logger.warning("Client %s inactive for too long, marking as disconnected", client_label(client_id))
+                        self.mark_client_disconnected(client_id)
                         
-                        writer = client_data.get("writer")
+                        writer = client_data.writer
                         if writer and not writer.is_closing():
                             try:
                                 writer.close()
@@ -274,12 +371,9 @@ class AbstractGameServer(abc.ABC):
                                 pass
                 
                 # Verificar si todos los clientes están desconectados
-                active_clients = {cid: data for cid, data in self.clients.items() 
-                                 if not data.get("disconnected", False)}
-                                 
-                if not active_clients and len(self.clients) > 0:
+                if not self.active_count and len(self.clients) > 0:
                     self.logger.info("All clients disconnected. Auto-shutting down server.")
-                    self.message_queue.put(f"{SM.KILL_SERVER}|{os.getpid()}")
+                    self.message_queue.send(f"{SM.KILL_SERVER}|{self.pid}")
                     break
                     
         except Exception as e:
@@ -289,7 +383,7 @@ class AbstractGameServer(abc.ABC):
         """Verificar si la cola de mensajes sigue activa"""
         try:
             # Prueba de verificación simple
-            self.message_queue.put_nowait(f"{SM.HEARTBEAT}|{os.getpid()}")
+            self.message_queue.send(f"{SM.HEARTBEAT}|{self.pid}")
             return True
         except Exception as e:
             self.logger.warning(f"Message queue appears to be unavailable: {e}")
@@ -300,7 +394,7 @@ class AbstractGameServer(abc.ABC):
         try:
             if hasattr(self, 'message_queue') and self.message_queue:
                 try:
-                    self.message_queue.put_nowait(message)
+                    self.message_queue.send(message)
                     return True
                 except:
                     # Silenciosamente fallar si la cola está llena o cerrada
@@ -155,16 +155,22 @@ class KryptoLogic:
         op2 = list[3]
         op3 = list[5]
 
+        apply_operation = KryptoLogic.apply_operation
+
+        # (X op1 Y) es común a los dos patrones: se calcula una sola vez.
+        # None es una operación no válida (división no exacta u operador desconocido)
+        first = apply_operation(X, op1, Y)
+        if first is None:
+            return False
+
         # Verficar para el patron Combinacion A (X op1 Y) op2 (Z op3 W)
-        if KryptoLogic.apply_operation(KryptoLogic.apply_operation(X, op1, Y), op2, KryptoLogic.apply_operation(Z, op3, W)) == answer:
+        right = apply_operation(Z, op3, W)
+        if right is not None and apply_operation(first, op2, right) == answer:
             return True
         
         # Verficar para el patron Combinacion B ((X op1 Y) op2 Z) op3 W
-        elif KryptoLogic.apply_operation(KryptoLogic.apply_operation(KryptoLogic.apply_operation(X, op1, Y), op2, Z), op3, W) == answer:
-            return True
-        
-        else:
-            return False
+        second = apply_operation(first, op2, Z)
+        return second is not None and apply_operation(second, op3, W) == answer
         
     @staticmethod
     def convertir(string):
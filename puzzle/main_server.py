@@ -1,11 +1,14 @@
 import os
-import uuid
+import pickle
+import secrets
 import socket
+import struct
+import inspect
 import asyncio
 import logging
-import threading
 import multiprocessing
-from queue import Empty
+from queue import Full
+from collections import deque
 from typing import Any, Dict
 
 from common.logger import Logger
@@ -16,8 +19,68 @@ from common.network import NetworkManager
 from common.communication import Communication
 
 from puzzle.logic import KryptoLogic
+from puzzle.puzzle_ring import PuzzleRing
 from puzzle.server_factory import ServerFactory
 
+# Cola de conexiones pendientes del socket de escucha (el kernel la recorta a somaxconn)
+LISTEN_BACKLOG = 4096
+
+# Búfer de lectura de cada jugador: una ráfaga de comandos cabe en una sola recv()
+# y ninguna línea (un comando terminado en '\n') puede superar este tamaño
+READ_CHUNK = 65536
+
+# Lectura de la tubería de los servidores de juego: tamaño de cada read() y cabecera
+# de longitud que antepone multiprocessing.Connection.send() a cada mensaje
+PIPE_READ_CHUNK = 65536
+PIPE_FRAME_HEADER = struct.Struct("!i")
+
+# PIDs de servidores fallidos que se recuerdan; los más antiguos se olvidan
+FAILED_SERVERS_LIMIT = 1024
+
+# Puzzles con los que arranca cada servidor de juego: el actual y el siguiente
+PUZZLES_PER_SERVER = 2
+
+# Respuestas fijas, codificadas una sola vez al importar el módulo
+_OK_B = f"{UM.OK}\n".encode()
+_LOGIN_SUCCESS_B = f"{UM.LOGIN_SUCCESS}\n".encode()
+_INVALID_USERNAME_B = f"{UM.LOGIN_FAIL}|Invalid username format\n".encode()
+_USERNAME_TAKEN_B = f"{UM.LOGIN_FAIL}|Username already taken\n".encode()
+_NO_SERVERS_B = f"{UM.SERVER_LIST}|No servers available\n".encode()
+_SERVER_LIST_B = f"{UM.SERVER_LIST}|".encode()
+_SERVER_NOT_FOUND_B = f"{UM.JOIN_FAIL}|Server not found\n".encode()
+_LOGIN_ERROR_B = f"{UM.LOGIN_FAIL}|Server error during login\n".encode()
+_LIST_ERROR_B = f"{UM.ERROR}|Error retrieving server list\n".encode()
+_INVALID_SERVER_NAME_B = f"{UM.CREATE_FAIL}|Invalid server name (minimum 3 characters)\n".encode()
+_INVALID_MODE_B = f"{UM.CREATE_FAIL}|Invalid game mode (must be 'classic' or 'competitive')\n".encode()
+_MAX_SERVERS_B = f"{UM.CREATE_FAIL}|Maximum number of servers reached\n".encode()
+_CREATE_FAILED_B = f"{UM.CREATE_FAIL}|Server creation failed\n".encode()
+_CREATE_PROCESS_ERROR_B = f"{UM.CREATE_FAIL}|Error starting server process\n".encode()
+_CREATE_REQUEST_ERROR_B = f"{UM.CREATE_FAIL}|Server error processing create request\n".encode()
+
+# Comandos con partes variables: sólo el prefijo se codifica por adelantado
+_ERROR_B = UM.ERROR.encode()
+_JOIN_FAIL_B = UM.JOIN_FAIL.encode()
+_JOIN_SUCCESS_B = UM.JOIN_SUCCESS.encode()
+_CREATE_SUCCESS_B = UM.CREATE_SUCCESS.encode()
+
+def _encode_message(command_b, *parts):
+    """Arma 'comando|parte|...\\n' ya en bytes a partir de un comando pre-codificado"""
+    return b"|".join((command_b, *(part if isinstance(part, bytes) else str(part).encode() for part in parts))) + b"\n"
+
+class _NullWriter:
+    """Writer de los mensajes de los servidores de juego: no hay socket al que responder"""
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        pass
+
+NULL_WRITER = _NullWriter()
+
 class MainServer:
     def __init__(self, host='0.0.0.0', port=5000, debug=False):
         """Initialize MainServer"""
@@ -32,10 +95,13 @@ class MainServer:
         self.server_ip = self.get_server_ip()
         logging.info(f"Server will use {self.server_ip} for external communications")
     
-        # Puzzles y servidores
-        self.puzzle_queue = multiprocessing.Queue()
-        self.message_queue = multiprocessing.Queue()
-        self.server_factory = ServerFactory(self.server_ip, self.puzzle_queue, self.message_queue)
+        # Puzzles y servidores: cada servidor de juego tiene su propia cola de puzzles
+        self.puzzle_pool = []  # Puzzles generados al arrancar, repartidos al crear servidores
+        self.puzzle_queues: Dict[int, Any] = {}  # {pid: PuzzleRing o multiprocessing.Queue}
+        # Tubería unidireccional: los servidores de juego escriben, el MainServer lee
+        self.message_pipe, self.server_pipe = multiprocessing.Pipe(duplex=False)
+        self.server_messages = asyncio.Queue()  # Mensajes ya decodificados de la tubería, en orden de llegada
+        self.server_factory = ServerFactory(self.server_ip, self.server_pipe)
         
         # Create loggers using the centralized logger
         self.server_logger = Logger.get("ServerCommunication", debug)
@@ -52,9 +118,15 @@ class MainServer:
 
         self.processes: Dict[int, Any] = {}  # {pid: process}
         self.servers: Dict[str, Dict[str, Any]] = {}  # {server_id: {"port": port, "name": name, ...}}
+        self.pid_to_server_id: Dict[int, str] = {}  # {pid: server_id}, índice inverso de self.servers
+        self.server_list_cache = None  # Respuesta a LIST_SERVERS ya codificada; None = reconstruir
         self.players: Dict[str, Dict[str, Any]] = {}  # {username: {"id": player_id, ...}}
+        self.writer_to_username: Dict[Any, str] = {}  # {writer: username}, índice inverso de self.players
         self.pending_servers: Dict[int, Any] = {}   # Dictionary to track servers being created
         self.failed_servers = set()  # Set of PIDs that failed to start
+        self.failed_servers_order = deque(maxlen=FAILED_SERVERS_LIMIT)  # Same PIDs, oldest first
+        self.loop = None  # Event loop del servidor, se fija al arrancar en start_main_server
+        self.shutting_down = False  # Activado por shutdown(): deja de atender a los servidores de juego
 
         self.main_logger.info(f"MainServer initialized with host={host}, port={port}, debug={debug}")
     
@@ -90,6 +162,8 @@ class MainServer:
             UM.LOGOUT: self.handle_logout,
         }
         self.users_communication.define_all_commands(handlers)
+        # handle_new_player despacha con esta tabla directamente, sin volver a pasar por Communication
+        self.user_dispatch = handlers
         self.main_logger.info("User command handlers registered")
 
     def register_server_command_handlers(self):
@@ -102,6 +176,8 @@ class MainServer:
             SM.PLAYER_EXIT: self.handle_player_exit,
         }
         self.server_communication.define_all_commands(handlers)
+        # process_message despacha con esta tabla directamente, sin volver a pasar por Communication
+        self.server_dispatch = handlers
         logging.info("Server command handlers registered")
 
     async def start_main_server(self):
@@ -112,6 +188,7 @@ class MainServer:
             self.host = '::' if NetworkManager.is_ipv6_available() else '0.0.0.0'
         
         self.main_logger.info(f"Starting main server on {self.host}:{self.port}")
+        self.loop = asyncio.get_running_loop()
         
         # Crear el socket manualmente para evitar problemas de resolución
         try:
@@ -132,34 +209,64 @@ class MainServer:
                 self.is_ipv6 = False
                 self.main_logger.info(f"Using IPv4 socket on {self.host}:{self.port}")
             
-            sock.listen(100)  # Permitir múltiples conexiones pendientes
+            sock.listen(LISTEN_BACKLOG)  # Permitir múltiples conexiones pendientes
             
             # Convertir a asyncio server
             server = await asyncio.start_server(
                 self.handle_new_player,
-                sock=sock
+                sock=sock,
+                limit=READ_CHUNK
             )
             
-            # Inicializar puzzles y listener
-            await self.initialize_puzzles()
             self.start_message_listener()
-            
-            # Mantener el servidor corriendo
-            await self.run_server(server, "Main Server")
+
+            # Atender jugadores mientras se generan los puzzles iniciales; si una
+            # tarea falla, el TaskGroup cancela la otra y propaga el error
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self.initialize_puzzles())
+                tg.create_task(self.consume_server_messages())
+                tg.create_task(self.run_server(server, "Main Server"))
             
         except Exception as e:
             self.main_logger.error(f"Error starting server: {e}")
             raise  # Re-lanzar para permitir un manejo adecuado en el código principal
 
     async def initialize_puzzles(self):
-        """Inicializar la cola con puzzles iniciales."""
-        loop = asyncio.get_running_loop()
-        for i in range(self.max_servers):
-            # Use run_in_executor to call synchronous code from async context
-            await loop.run_in_executor(None, 
-                                    lambda: self.puzzle_queue.put(KryptoLogic.generar_puzzle()))
+        """Generar los puzzles iniciales que se reparten a los servidores al crearlos."""
+        # Un único salto al executor para todo el lote, en vez de uno por puzzle
+        puzzles = await self.loop.run_in_executor(None, self.generate_puzzles, self.max_servers)
+        self.puzzle_pool.extend(puzzles)
         logging.info("Puzzles inicializados")
 
+    @staticmethod
+    def generate_puzzles(count):
+        """Generar varios puzzles seguidos (se ejecuta fuera del event loop)"""
+        return [KryptoLogic.generar_puzzle() for _ in range(count)]
+
+    def create_puzzle_queue(self):
+        """Cola de puzzles de un servidor: anillo en memoria compartida, o multiprocessing.Queue en debug"""
+        if self.debug:
+            return multiprocessing.Queue()
+        return PuzzleRing()
+
+    async def seed_puzzle_queue(self, puzzle_queue):
+        """Cargar los primeros puzzles de un servidor antes de arrancar su proceso"""
+        for _ in range(PUZZLES_PER_SERVER):
+            if self.puzzle_pool:
+                puzzle = self.puzzle_pool.pop()
+            else:
+                puzzle = await self.loop.run_in_executor(None, KryptoLogic.generar_puzzle)
+            puzzle_queue.put_nowait(puzzle)
+
+    def release_puzzle_queue(self, puzzle_queue):
+        """Cerrar la cola de puzzles de un servidor que ya no existe"""
+        try:
+            puzzle_queue.close()
+            if isinstance(puzzle_queue, PuzzleRing):
+                puzzle_queue.unlink()
+        except Exception as e:
+            self.main_logger.warning(f"Error releasing puzzle queue: {e}")
+
     def get_server_ip(self):
         """Obtener IP real del servidor para comunicaciones externas"""
         try:
@@ -191,49 +298,85 @@ class MainServer:
         addr = writer.get_extra_info('peername')
         logging.info(f"Nueva conexión recibida desde {addr}")
 
-        while True:
-            try:
-                data = await reader.read(1024)  # Increased buffer size
-                if not data:
+        # Detectar pares caídos para liberar el descriptor sin esperar al GC,
+        # y enviar sin demora las respuestas cortas del protocolo
+        sock = writer.get_extra_info('socket')
+        NetworkManager.enable_keepalive(sock)
+        NetworkManager.enable_nodelay(sock)
+
+        # Referencias locales: evitan repetir las búsquedas de atributos en cada mensaje
+        readuntil = reader.readuntil
+        get_handler = self.user_dispatch.get
+        users_logger = self.users_logger
+        debug_enabled = users_logger.isEnabledFor
+
+        try:
+            while True:
+                try:
+                    # Los clientes terminan cada comando con '\n'; el StreamReader
+                    # guarda lo que sobre de una ráfaga para la siguiente línea
+                    data = await readuntil(b'\n')
+                    message = data[:-1].decode()
+                    if not message:
+                        continue
+                    if debug_enabled(logging.DEBUG):
+                        Logger.log_incoming(users_logger, addr, message)
+
+                    # "comando|arg|arg...": un solo corte para encontrar el manejador
+                    command, sep, rest = message.partition('|')
+                    handler = get_handler(command.strip())
+                    if handler is None:
+                        users_logger.warning(f"No handler found for command: {command}")
+                        continue
+                    try:
+                        result = handler(writer, *rest.split('|')) if sep else handler(writer)
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception as e:
+                        # Un comando que falla no cierra la conexión del jugador
+                        users_logger.exception("Error executing handler %s: %s", handler.__name__, e)
+                except asyncio.IncompleteReadError:
+                    # EOF: un comando a medias sin '\n' final se descarta
                     logging.info(f"Conexión cerrada por {addr}")
                     break
-                message = data.decode()
-                Logger.log_incoming(logging, addr, message)
-                
-                # Handle command through the Communication object
-                await self.users_communication.handle_async_command(message, writer)
-            except asyncio.CancelledError:
-                logging.info(f"Connection handling for {addr} was cancelled")
-                break
-            except ConnectionResetError:
-                logging.warning(f"Connection reset by {addr}")
-                break
-            except Exception as e:
-                logging.error(f"Error manejando la conexión con {addr}: {e}")
-                try:
-                    error_msg = f"{UM.ERROR}|Server internal error: {str(e)}"
-                    await self.users_communication.send_message_async(writer, error_msg)
-                    Logger.log_outgoing(logging, addr, error_msg)
-                except:
-                    pass  # If we can't send the error, we just log it
-                break
-
-        # Clean up
-        try:
+                except asyncio.LimitOverrunError:
+                    logging.warning(f"Line longer than {READ_CHUNK} bytes from {addr}, closing connection")
+                    break
+                except asyncio.CancelledError:
+                    logging.info(f"Connection handling for {addr} was cancelled")
+                    break
+                except ConnectionResetError:
+                    logging.warning(f"Connection reset by {addr}")
+                    break
+                except Exception as e:
+                    logging.error(f"Error manejando la conexión con {addr}: {e}")
+                    try:
+                        error_msg = _encode_message(_ERROR_B, f"Server internal error: {e}")
+                        await self.users_communication.send_bytes_async(writer, error_msg)
+                        Logger.log_outgoing(logging, addr, error_msg)
+                    except:
+                        pass  # If we can't send the error, we just log it
+                    break
+        finally:
+            # Clean up: una desconexión sin LOGOUT también cierra la sesión del jugador
+            username = self.writer_to_username.pop(writer, None)
+            if username:
+                self.players.pop(username, None)
+                logging.info(f"Player {username} disconnected without logout")
             writer.close()
-            await writer.wait_closed()
-            logging.info(f"Connection with {addr} closed properly")
-        except:
-            logging.warning(f"Could not properly close connection with {addr}")
+            try:
+                await writer.wait_closed()
+                logging.info(f"Connection with {addr} closed properly")
+            except Exception:
+                logging.warning(f"Could not properly close connection with {addr}")
     
     async def handle_test_message(self, writer):
         """Handles test message from client and responds with OK"""
         addr = writer.get_extra_info('peername')
 
         try:
-            response = UM.OK
-            await self.users_communication.send_message_async(writer, response)
-            Logger.log_outgoing(logging, addr, response)
+            await self.users_communication.send_bytes_async(writer, _OK_B)
+            Logger.log_outgoing(logging, addr, _OK_B)
         except Exception as e:
             logging.error(f"Error sending OK response to {addr}: {e}")
 
@@ -243,34 +386,31 @@ class MainServer:
         try:
             # Basic username validation
             if not username or not (3 <= len(username) <= 20):
-                response = f"{UM.LOGIN_FAIL}|Invalid username format"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
+                await self.users_communication.send_bytes_async(writer, _INVALID_USERNAME_B)
+                Logger.log_outgoing(logging, addr, _INVALID_USERNAME_B)
                 return
                 
             # Check if username is already taken
             if username in self.players:
-                response = f"{UM.LOGIN_FAIL}|Username already taken"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
+                await self.users_communication.send_bytes_async(writer, _USERNAME_TAKEN_B)
+                Logger.log_outgoing(logging, addr, _USERNAME_TAKEN_B)
                 return
                 
             # Register the player
-            player_id = str(uuid.uuid4())[:8]
+            player_id = secrets.token_hex(4)
             self.players[username] = {"id": player_id, "writer": writer}
+            self.writer_to_username[writer] = username
             logging.info(f"Jugador conectado: {username} (ID: {player_id})")
             
             # Send success response
-            response = f"{UM.LOGIN_SUCCESS}"
-            await self.users_communication.send_message_async(writer, response)
-            Logger.log_outgoing(logging, addr, response)
+            await self.users_communication.send_bytes_async(writer, _LOGIN_SUCCESS_B)
+            Logger.log_outgoing(logging, addr, _LOGIN_SUCCESS_B)
             logging.info(f"Login successful for {username} from {addr}")
         except Exception as e:
             logging.error(f"Error in login for {username} from {addr}: {e}")
             try:
-                response = f"{UM.LOGIN_FAIL}|Server error during login"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
+                await self.users_communication.send_bytes_async(writer, _LOGIN_ERROR_B)
+                Logger.log_outgoing(logging, addr, _LOGIN_ERROR_B)
             except:
                 pass  # If we can't send the error, we just log it
 
@@ -279,38 +419,42 @@ class MainServer:
         addr = writer.get_extra_info('peername')
         logging.info(f"Server list requested from {addr}")
         try:
-            if not self.servers:
-                response = f"{UM.SERVER_LIST}|No servers available"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
-                return
+            # La lista sólo cambia al crear o quitar servidores o al entrar o salir jugadores
+            response = self.server_list_cache
+            if response is None:
+                response = self.server_list_cache = self.build_server_list()
 
-            server_list = []
-            for server_id, details in self.servers.items():
-                # Usar .get() con valores por defecto para prevenir KeyError
-                server_name = details.get('name', 'Unnamed')
-                server_mode = details.get('mode', 'Unknown')
-                player_count = details.get('player_count', 0)
-                max_players = details.get('max_players', 8)
-                
-                server_list.append(
-                    f"ID: {server_id}, Name: {server_name}, Mode: {server_mode}, Players: {player_count}/{max_players}"
-                )
-            
-            server_list_str = "\n".join(server_list)
-            response = f"{UM.SERVER_LIST}|{server_list_str}"
-            await self.users_communication.send_message_async(writer, response)
+            await self.users_communication.send_bytes_async(writer, response)
             Logger.log_outgoing(logging, addr, response)
-            logging.info(f"Sent server list to {addr}: {len(self.servers)} servers")
+            logging.info("Sent server list to %s: %d servers", addr, len(self.servers))
         except Exception as e:
             logging.error(f"Error sending server list to {addr}: {e}")
             try:
-                response = f"{UM.ERROR}|Error retrieving server list"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
+                await self.users_communication.send_bytes_async(writer, _LIST_ERROR_B)
+                Logger.log_outgoing(logging, addr, _LIST_ERROR_B)
             except:
                 pass  # If we can't send the error, we just log it
 
+    def build_server_list(self):
+        """Codificar la respuesta a LIST_SERVERS a partir de self.servers"""
+        if not self.servers:
+            return _NO_SERVERS_B
+
+        chunks = [_SERVER_LIST_B]
+        extend = chunks.extend
+        for server_id, details in self.servers.items():
+            # Usar .get() con valores por defecto para prevenir KeyError
+            get = details.get
+            extend((
+                b"ID: ", server_id.encode(),
+                b", Name: ", str(get('name', 'Unnamed')).encode(),
+                b", Mode: ", str(get('mode', 'Unknown')).encode(),
+                b", Players: ", str(get('player_count', 0)).encode(),
+                b"/", str(get('max_players', 8)).encode(),
+                b"\n",  # Separa servidores y, el último, termina el mensaje
+            ))
+        return b"".join(chunks)
+
     async def handle_server_choice(self, writer, server_id):
         """Handle a player's server choice"""
         addr = writer.get_extra_info('peername')
@@ -318,9 +462,8 @@ class MainServer:
         logging.info(f"Server choice from {addr}: {server_id}")
         
         if server_id not in self.servers:
-            response = f"{UM.JOIN_FAIL}|Server not found"
-            await self.users_communication.send_message_async(writer, response)
-            Logger.log_outgoing(logging, addr, response)
+            await self.users_communication.send_bytes_async(writer, _SERVER_NOT_FOUND_B)
+            Logger.log_outgoing(logging, addr, _SERVER_NOT_FOUND_B)
             return
         
         # Check if the server has reached its maximum capacity
@@ -329,18 +472,18 @@ class MainServer:
         max_players = server_details.get("max_players", 8)
         
         if current_players >= max_players:
-            response = f"{UM.JOIN_FAIL}|Server is full ({current_players}/{max_players})"
-            await self.users_communication.send_message_async(writer, response)
+            response = _encode_message(_JOIN_FAIL_B, f"Server is full ({current_players}/{max_players})")
+            await self.users_communication.send_bytes_async(writer, response)
             Logger.log_outgoing(logging, addr, response)
             return
         
         # Send server details to the player
-        name = self.servers[server_id]["name"]
-        port = self.servers[server_id]["port"]
-        mode = self.servers[server_id]["mode"]
+        name = server_details["name"]
+        port = server_details["port"]
+        mode = server_details["mode"]
         
-        response = f"{UM.JOIN_SUCCESS}|{server_details['name']}|{self.server_ip}|{server_details['port']}|{server_details['mode']}"
-        await self.users_communication.send_message_async(writer, response)
+        response = _encode_message(_JOIN_SUCCESS_B, name, self.server_ip, port, mode)
+        await self.users_communication.send_bytes_async(writer, response)
         Logger.log_outgoing(logging, addr, response)
         logging.info(f"Player from {addr} joined server {name} ({current_players+1}/{max_players})")
 
@@ -351,35 +494,41 @@ class MainServer:
         try:
             # Validate server settings
             if not server_name or len(server_name) < 3:
-                response = f"{UM.CREATE_FAIL}|Invalid server name (minimum 3 characters)"
+                response = _INVALID_SERVER_NAME_B
             elif server_mode not in ["classic", "competitive"]:
-                response = f"{UM.CREATE_FAIL}|Invalid game mode (must be 'classic' or 'competitive')"
+                response = _INVALID_MODE_B
             elif len(self.servers) >= self.max_servers:
-                response = f"{UM.CREATE_FAIL}|Maximum number of servers reached"
+                response = _MAX_SERVERS_B
             else:
                 response = None
 
             if response:
-                await self.users_communication.send_message_async(writer, response)
+                await self.users_communication.send_bytes_async(writer, response)
                 Logger.log_outgoing(logging, addr, response)
                 return
                 
             # Create a new server
-            server_id = str(uuid.uuid4())[:4]  # First 4 characters of UUID for server ID
+            server_id = secrets.token_hex(2)  # 4 hex characters for server ID
+            while server_id in self.servers:  # 2 bytes can collide, draw again
+                server_id = secrets.token_hex(2)
             
+            puzzle_queue = self.create_puzzle_queue()
             try:
+                await self.seed_puzzle_queue(puzzle_queue)
+
                 # Start server process
-                result = self.server_factory.create_server(server_name, server_mode, number)
+                result = self.server_factory.create_server(server_name, server_mode, number, puzzle_queue)
                 if not result:
-                    response = f"{UM.CREATE_FAIL}|Server creation failed"
-                    await self.users_communication.send_message_async(writer, response)
-                    Logger.log_outgoing(logging, addr, response)
+                    self.release_puzzle_queue(puzzle_queue)
+                    await self.users_communication.send_bytes_async(writer, _CREATE_FAILED_B)
+                    Logger.log_outgoing(logging, addr, _CREATE_FAILED_B)
                     return
 
                 server_pid, server_port, server_process = result
                 
                 # IMPORTANT: Store the server process in the processes dictionary
                 self.processes[server_pid] = server_process
+                self.puzzle_queues[server_pid] = puzzle_queue
                 
                 # Register server
                 self.servers[server_id] = {
@@ -390,41 +539,39 @@ class MainServer:
                     "max_players": int(number),
                     "port": server_port
                 }
+                self.pid_to_server_id[int(server_pid)] = server_id
+                self.server_list_cache = None
                 
                 # Notify client
-                response = f"{UM.CREATE_SUCCESS}|{server_id}"
-                await self.users_communication.send_message_async(writer, response)
+                response = _encode_message(_CREATE_SUCCESS_B, server_id)
+                await self.users_communication.send_bytes_async(writer, response)
                 Logger.log_outgoing(logging, addr, response)
                 self.main_logger.info(f"Created server with ID '{server_id}' (PID: {server_pid}): {server_name} ({server_mode}) on port {server_port}")
             
             except Exception as e:
                 logging.error(f"Error creating server process: {e}")
-                response = f"{UM.CREATE_FAIL}|Error starting server process"
-                await self.users_communication.send_message_async(writer, response)
-                Logger.log_outgoing(logging, addr, response)
+                if puzzle_queue not in self.puzzle_queues.values():
+                    self.release_puzzle_queue(puzzle_queue)
+                await self.users_communication.send_bytes_async(writer, _CREATE_PROCESS_ERROR_B)
+                Logger.log_outgoing(logging, addr, _CREATE_PROCESS_ERROR_B)
 
         except Exception as e:
             logging.error(f"Error in create_server handler from {addr}: {e}")
 
-            response = f"{UM.CREATE_FAIL}|Server error processing create request"
-            await self.users_communication.send_message_async(writer, response)
-            Logger.log_outgoing(logging, addr, response)
+            await self.users_communication.send_bytes_async(writer, _CREATE_REQUEST_ERROR_B)
+            Logger.log_outgoing(logging, addr, _CREATE_REQUEST_ERROR_B)
 
 
-    async def handle_logout(self, writer):
+    def handle_logout(self, writer):
         """Handle player logout"""
         addr = writer.get_extra_info('peername')
         logging.info(f"Logout request from {addr}")
         
         # Find and remove player by writer object
-        username_to_remove = None
-        for username, data in self.players.items():
-            if data.get("writer") == writer:
-                username_to_remove = username
-                break
+        username_to_remove = self.writer_to_username.pop(writer, None)
                 
         if username_to_remove:
-            del self.players[username_to_remove]
+            self.players.pop(username_to_remove, None)
             logging.info(f"Player {username_to_remove} logged out")
             
         # No need to respond as client is disconnecting
@@ -432,135 +579,170 @@ class MainServer:
     """------------------------------------------- Manejo de Servidores de Juego ------------------------------------------- """
     
     def start_message_listener(self):
-        """Start a separate thread to listen for messages"""
-        message_logger = logging.getLogger("message_listener")
-        self.shutdown_event = threading.Event()  # Evento para señalizar el cierre
-        
-        def listener_thread():
-            message_logger.info("Message listener thread started")
-            while not self.shutdown_event.is_set():  # Verificar si se debe detener
+        """Register the server pipe with the event loop to receive GameServer messages"""
+        self.message_logger = logging.getLogger("message_listener")
+        self.pipe_buffer = bytearray()  # Bytes read from the pipe not yet forming a full frame
+
+        # The read end is a plain fd: the loop wakes us only when data is available
+        self.loop.add_reader(self.message_pipe.fileno(), self.on_server_message)
+        self.main_logger.info("Message listener registered on event loop")
+
+    def on_server_message(self):
+        """Read the available bytes from the server pipe and split them into messages
+
+        Game servers write with Connection.send(), so each frame is a 4-byte
+        big-endian length followed by the pickled message.
+        """
+        fd = self.message_pipe.fileno()
+        try:
+            chunk = os.read(fd, PIPE_READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.message_logger.error(f"Server pipe closed: {e}")
+            self.loop.remove_reader(fd)
+            return
+
+        if not chunk:
+            self.message_logger.error("Server pipe closed: EOF")
+            self.loop.remove_reader(fd)
+            return
+
+        buffer = self.pipe_buffer
+        buffer += chunk
+        put = self.server_messages.put_nowait
+        header_size = PIPE_FRAME_HEADER.size
+        end = len(buffer)
+        offset = 0
+        with memoryview(buffer) as view:
+            while end - offset >= header_size:
+                (size,) = PIPE_FRAME_HEADER.unpack_from(view, offset)
+                if size < 0:
+                    # The header itself is corrupt: no frame boundary can be trusted after it
+                    self.message_logger.error(f"Invalid server message length: {size}")
+                    offset = end
+                    break
+                start = offset + header_size
+                if end - start < size:
+                    break  # Incomplete frame, wait for more data
+                offset = start + size
+                # A bad payload only costs its own frame: the next one still starts at offset
                 try:
-                    # Usar get con timeout para poder verificar el evento periódicamente
-                    try:
-                        message = self.message_queue.get(timeout=0.5)
-                        Logger.log_incoming(message_logger, "GameServer", message)
-                        
-                        # Debug print only if debug is enabled
-                        if self.debug:
-                            print(f"Debug - Received message from GameServer: {message}")
-                        
-                        # Run the coroutine directly in a new event loop inside this thread
-                        local_loop = asyncio.new_event_loop()
-                        try:
-                            local_loop.run_until_complete(self.process_message(message))
-                        finally:
-                            local_loop.close()
-                    except Empty:
-                        # Timeout - solo continuar para comprobar shutdown_event
-                        pass
-                        
+                    message = pickle.loads(view[start:offset])
                 except Exception as e:
-                    message_logger.error(f"Error in message listener thread: {e}")
-                    import traceback
-                    message_logger.error(traceback.format_exc())
-                    
-            message_logger.info("Message listener thread stopped")
-        
-        self.listener_thread = threading.Thread(target=listener_thread, daemon=True)
-        self.listener_thread.start()
-        self.main_logger.info("Message listener thread started")
+                    self.message_logger.error(f"Error decoding server message: {e}")
+                    continue
+                put(message)
+        del buffer[:offset]
+
+    async def consume_server_messages(self):
+        """Process GameServer messages one at a time, in the order they arrived"""
+        get = self.server_messages.get
+        while not self.shutting_down:
+            message = await get()
+            if self.shutting_down:
+                break  # Los servidores se están terminando: sus OK/KILL ya no importan
+            Logger.log_incoming(self.message_logger, "GameServer", message)
+            await self.process_message(message)
 
     async def process_message(self, message):
         """Process a message from the queue in the event loop"""
         process_logger = logging.getLogger("process_message")
         
         try:
-            process_logger.debug(f"Processing GameServer message: {message}")
+            process_logger.debug("Processing GameServer message: %s", message)
             
             # Check if message has the expected format
             if not message or '|' not in message:
                 process_logger.error(f"Invalid message format received: {message}")
                 return
-                
-            # Create a dummy writer object since our handlers expect it
-            dummy_writer = None
-            
-            # Debug output only if debug is enabled
-            if self.debug:
-                print(f"Debug - Parsing message: '{message}'")
-                parts = message.split('|')
-                print(f"Debug - Command: '{parts[0]}', Args: {parts[1:] if len(parts) > 1 else []}")
-                
-                # Direct execution for debugging in debug mode
-                if parts[0] == SM.OK and len(parts) > 1:
-                    print(f"Debug - Executing OK handler directly with PID: {parts[1]}")
-                    await self.handle_server_ok(dummy_writer, parts[1], *parts[2:])
-                    return
-            
-            # Use handle_async_command to find and execute the appropriate handler
-            await self.server_communication.handle_async_command(message, dummy_writer)
+
+            # Un único corte del mensaje: "comando|pid|..."
+            command, _, rest = message.partition('|')
+            handler = self.server_dispatch.get(command)
+            if handler is None:
+                process_logger.warning(f"No handler found for GameServer command: {command}")
+                return
+
+            # Handlers share the user-command signature, so they get a writer that discards output
+            result = handler(NULL_WRITER, *rest.split('|'))
+            if inspect.isawaitable(result):
+                await result
             
         except Exception as e:
-            process_logger.error(f"Error processing message: {e}")
-            import traceback
-            process_logger.error(traceback.format_exc())
+            process_logger.exception("Error processing message: %s", e)
     
     async def handle_server_ok(self, writer, pid, *args):
         """Handle OK message from a game server"""
         self.main_logger.info(f"Server with PID {pid} reported OK status")
         
-        # Generate a new puzzle and add it to the queue
+        puzzle_queue = self.puzzle_queues.get(int(pid))
+        if puzzle_queue is None:
+            self.main_logger.warning(f"No puzzle queue for server with PID {pid}")
+            return
+
+        # Generate a new puzzle and hand it to the server that consumed one;
+        # the put never blocks, so it runs directly on the event loop
         puzzle = KryptoLogic.generar_puzzle()
-        # Use run_in_executor for the blocking Queue.put operation
-        await asyncio.get_event_loop().run_in_executor(
-            None, lambda: self.puzzle_queue.put(puzzle))
+        try:
+            puzzle_queue.put_nowait(puzzle)
+        except Full:
+            self.main_logger.warning(f"Puzzle queue for server with PID {pid} is full, dropping puzzle")
+            return
         
         self.main_logger.info(f"New puzzle generated for server with PID {pid}")
-        Logger.log_outgoing(logging, f"GameServer-{pid}", f"PUZZLE: {puzzle}")
+        if self.debug:
+            Logger.log_outgoing(logging, f"GameServer-{pid}", f"PUZZLE: {puzzle}")
 
     async def handle_server_error(self, writer, pid, *args):
         """Handle error message from a game server"""
         error_msg = args[0] if args else "Unknown error"
         self.main_logger.error(f"Error reported by server with PID {pid}: {error_msg}")
         
+        pid = int(pid)
+
         # Add to failed servers list
-        self.failed_servers.add(int(pid))
+        self.remember_failed_server(pid)
         
         # If it was a pending server, remove it
-        if int(pid) in self.pending_servers:
-            del self.pending_servers[int(pid)]
+        self.pending_servers.pop(pid, None)
         
         # Check if we need to terminate the server
-        server_id_to_remove = None
-        for server_id, details in self.servers.items():
-            if str(details.get("pid")) == str(pid):
-                server_id_to_remove = server_id
-                break
+        server_id_to_remove = self.pid_to_server_id.pop(pid, None)
                 
         if server_id_to_remove:
             # Always terminate on error
-            await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.terminate_server_process(pid))
+            await self.loop.run_in_executor(
+                None, self.terminate_server_process, pid)
             del self.servers[server_id_to_remove]
+            self.server_list_cache = None
             self.main_logger.warning(f"Server with ID '{server_id_to_remove}' (PID: {pid}) terminated due to error")
 
+    def remember_failed_server(self, pid):
+        """Record a failed PID, forgetting the oldest once FAILED_SERVERS_LIMIT is reached"""
+        if pid in self.failed_servers:
+            return
+        order = self.failed_servers_order
+        if len(order) == order.maxlen:
+            self.failed_servers.discard(order[0])  # append() below pushes it out of the deque
+        order.append(pid)
+        self.failed_servers.add(pid)
+
     async def handle_server_kill(self, writer, pid, *args):
         """Handle kill request from a game server"""
         self.main_logger.info(f"Kill request from server with PID {pid}")
         
+        # Resolve the server before terminate_server_process drops its PID from the index
+        server_id_to_remove = self.pid_to_server_id.pop(int(pid), None)
+
         # Terminate the process
-        await asyncio.get_event_loop().run_in_executor(
-            None, lambda: self.terminate_server_process(pid))
+        await self.loop.run_in_executor(
+            None, self.terminate_server_process, pid)
         
         # Remove from servers list
-        server_id_to_remove = None
-        for server_id, details in self.servers.items():
-            if str(details.get("pid")) == str(pid):
-                server_id_to_remove = server_id
-                break
-                
         if server_id_to_remove:
             del self.servers[server_id_to_remove]
+            self.server_list_cache = None
             self.main_logger.info(f"Server with ID '{server_id_to_remove}' (PID: {pid}) removed from active servers")
 
     def terminate_server_process(self, pid):
@@ -573,52 +755,50 @@ class MainServer:
                 process.terminate()
                 process.join(timeout=2)
                 del self.processes[pid]
+                self.pid_to_server_id.pop(pid, None)
+                puzzle_queue = self.puzzle_queues.pop(pid, None)
+                if puzzle_queue is not None:
+                    self.release_puzzle_queue(puzzle_queue)
                 self.main_logger.info(f"Process with PID {pid} terminated successfully")
             else:
                 self.main_logger.warning(f"Cannot terminate: No process found with PID {pid}")
         except Exception as e:
             self.main_logger.error(f"Error terminating process with PID {pid}: {e}")
 
-    async def handle_player_join(self, writer, pid, *args):
+    def handle_player_join(self, writer, pid, *args):
         """Handle player join notification from game server"""
         try:
             pid = int(pid)
             
             # Encontrar el servidor por PID
-            server_id_to_update = None
-            for server_id, details in self.servers.items():
-                if details.get("pid") == pid:
-                    server_id_to_update = server_id
-                    break
+            server_id_to_update = self.pid_to_server_id.get(pid)
                     
             if server_id_to_update:
                 # Incrementar el contador de jugadores
                 current_count = self.servers[server_id_to_update].get("player_count", 0)
                 new_count = min(self.servers[server_id_to_update].get("max_players", 8), current_count + 1)
                 self.servers[server_id_to_update]["player_count"] = new_count
+                self.server_list_cache = None
                 self.main_logger.debug(f"Player joined server {server_id_to_update}. New player count: {new_count}")
             else:
                 self.main_logger.warning(f"Received player join for unknown server PID {pid}")
         except Exception as e:
             self.main_logger.error(f"Error handling player join: {e}")
     
-    async def handle_player_exit(self, writer, pid):
+    def handle_player_exit(self, writer, pid):
         """Handle player exit notification from game server"""
         try:
             pid = int(pid)
             
             # Encontrar el servidor por PID
-            server_id_to_update = None
-            for server_id, details in self.servers.items():
-                if details.get("pid") == pid:
-                    server_id_to_update = server_id
-                    break
+            server_id_to_update = self.pid_to_server_id.get(pid)
                     
             if server_id_to_update:
                 # Decrementar el contador de jugadores
                 current_count = self.servers[server_id_to_update].get("player_count", 1)
                 new_count = max(0, current_count - 1)  # Asegurar que no sea negativo
                 self.servers[server_id_to_update]["player_count"] = new_count
+                self.server_list_cache = None
                 self.main_logger.debug(f"Player exited from server {server_id_to_update}. New player count: {new_count}")
             else:
                 self.main_logger.warning(f"Received player exit for unknown server PID {pid}")
@@ -628,14 +808,12 @@ class MainServer:
     async def shutdown(self):
         """Clean shutdown of the main server"""
         logging.info("Shutting down MainServer...")
+        self.shutting_down = True
+        self.server_messages.put_nowait(None)  # Despierta a consume_server_messages para que termine
         
-        # Señalizar al hilo de escucha que debe terminar
-        if hasattr(self, 'shutdown_event'):
-            self.shutdown_event.set()
-            
-        # Esperar a que el hilo termine (opcional)
-        if hasattr(self, 'listener_thread') and self.listener_thread.is_alive():
-            self.listener_thread.join(timeout=2.0)
+        # Dejar de escuchar la tubería de los servidores de juego
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.remove_reader(self.message_pipe.fileno())
         
         # Terminate all game server processes
         for pid in list(self.processes.keys()):
@@ -643,7 +821,10 @@ class MainServer:
                 
         # Clear all data structures
         self.servers.clear()
+        self.server_list_cache = None
+        self.pid_to_server_id.clear()
         self.players.clear()
+        self.writer_to_username.clear()
         self.processes.clear()
         
         logging.info("MainServer shutdown complete")
@@ -660,18 +841,26 @@ if __name__ == "__main__":
 
     multiprocessing.set_start_method('spawn')
     
-    main_server = MainServer(host=args.host, port=args.port, debug=args.debug)
+    # uvloop es opcional: si está instalado sustituye al event loop por defecto
     try:
-        asyncio.run(main_server.start_main_server())
-    except KeyboardInterrupt:
-        logging.info("Server stopped by Admin")
-        os._exit(0)
-    except Exception as e:
-        logging.error(f"Server stopped due to error: {e}")
-        os._exit(1)
-    finally:
-        # Ensure clean shutdown
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(main_server.shutdown())
-        loop.close()
\ No newline at end of file
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+
+    main_server = MainServer(host=args.host, port=args.port, debug=args.debug)
+    exit_code = 0
+    # Un único loop para servir y para el apagado: los transportes y el lector
+    # de la tubería siguen ligados al loop en el que se crearon
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        try:
+            runner.run(main_server.start_main_server())
+        except KeyboardInterrupt:
+            logging.info("Server stopped by Admin")
+        except Exception as e:
+            logging.error(f"Server stopped due to error: {e}")
+            exit_code = 1
+        finally:
+            # Ensure clean shutdown
+            runner.run(main_server.shutdown())
+    os._exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,147 @@
+import struct
+import time
+import multiprocessing
+from queue import Empty, Full
+from multiprocessing import shared_memory
+
+# Un puzzle son 5 cartas (4 números y el objetivo), cada una entre 1 y 12
+PUZZLE_SLOT = struct.Struct("5h")
+
+# Índices de escritura y lectura: contadores que sólo crecen, la posición es índice % capacidad.
+# Cada uno ocupa su propia línea de caché para que productor y consumidor no se
+# invaliden mutuamente al actualizar el suyo (el bloque compartido empieza alineado a página)
+RING_INDEX = struct.Struct("Q")
+CACHE_LINE = 64
+WRITE_OFFSET = 0
+READ_OFFSET = CACHE_LINE
+SLOTS_OFFSET = 2 * CACHE_LINE
+
+_WAKEUP = b"\x01"
+
+
+class PuzzleRing:
+    """
+    Cola de puzzles de un único productor (el MainServer) y un único consumidor
+    (el servidor de juego al que pertenece), en memoria compartida.
+
+    Los puzzles se copian con struct en huecos de tamaño fijo, sin pickle ni locks.
+    Cada lado guarda su propio índice y una copia local del índice del otro, que
+    sólo vuelve a leer de la memoria compartida cuando el anillo parece lleno
+    (productor) o vacío (consumidor).
+    Cada put() escribe además un byte en una tubería para despertar a un consumidor
+    bloqueado en get(); la tubería y el bloque de memoria viajan al proceso hijo
+    al pasar el anillo como argumento de multiprocessing.Process.
+
+    Imita la interfaz de multiprocessing.Queue que usan los servidores de juego:
+    put_nowait(), get(), get_nowait(), empty() y qsize().
+    """
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=SLOTS_OFFSET + capacity * PUZZLE_SLOT.size)
+        self._buf = self._shm.buf  # El bloque nuevo llega a cero: ambos índices empiezan en 0
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self._load_indices()
+
+    def __getstate__(self):
+        # El memoryview no se puede serializar: el hijo se vuelve a conectar por nombre
+        state = self.__dict__.copy()
+        del state["_buf"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buf = self._shm.buf
+        self._load_indices()
+
+    def _load_indices(self):
+        """Copias locales de los índices: el propio de cada lado y el último visto del otro"""
+        buf = self._buf
+        (self._write,) = RING_INDEX.unpack_from(buf, WRITE_OFFSET)
+        (self._read,) = RING_INDEX.unpack_from(buf, READ_OFFSET)
+        self._local_read = self._read    # Vista del productor sobre el consumidor
+        self._local_write = self._write  # Vista del consumidor sobre el productor
+
+    """------------------------------------------- Productor ------------------------------------------- """
+
+    def put_nowait(self, puzzle):
+        """Publica un puzzle; lanza queue.Full si el consumidor no ha vaciado huecos"""
+        buf = self._buf
+        write = self._write
+        if write - self._local_read >= self.capacity:
+            # Sólo parece lleno: mirar cuánto ha avanzado realmente el consumidor
+            (self._local_read,) = RING_INDEX.unpack_from(buf, READ_OFFSET)
+            if write - self._local_read >= self.capacity:
+                raise Full
+
+        PUZZLE_SLOT.pack_into(buf, SLOTS_OFFSET + (write % self.capacity) * PUZZLE_SLOT.size, *puzzle)
+        # El hueco queda escrito antes de que el nuevo índice lo haga visible
+        self._write = write + 1
+        RING_INDEX.pack_into(buf, WRITE_OFFSET, self._write)
+        self._wake_writer.send_bytes(_WAKEUP)
+
+    put = put_nowait  # Nunca bloquea al productor, que corre en el event loop
+
+    """------------------------------------------- Consumidor ------------------------------------------- """
+
+    def get(self, block=True, timeout=None):
+        """Saca el puzzle más antiguo; lanza queue.Empty si no llega ninguno a tiempo"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Descartar los avisos pendientes antes de mirar el anillo: todo aviso
+            # se envía después de publicar su puzzle, así que no se pierde ninguno
+            self._drain_wakeups()
+            puzzle = self._pop()
+            if puzzle is not None:
+                return puzzle
+            if not block:
+                raise Empty
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise Empty
+            if not self._wake_reader.poll(remaining):
+                raise Empty
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        """Vista del consumidor: ¿queda algún puzzle por leer?"""
+        if self._read != self._local_write:
+            return False
+        (self._local_write,) = RING_INDEX.unpack_from(self._buf, WRITE_OFFSET)
+        return self._read == self._local_write
+
+    def qsize(self):
+        buf = self._buf
+        return RING_INDEX.unpack_from(buf, WRITE_OFFSET)[0] - RING_INDEX.unpack_from(buf, READ_OFFSET)[0]
+
+    def _pop(self):
+        if self.empty():
+            return None
+
+        buf = self._buf
+        read = self._read
+        puzzle = list(PUZZLE_SLOT.unpack_from(buf, SLOTS_OFFSET + (read % self.capacity) * PUZZLE_SLOT.size))
+        # Liberar el hueco sólo después de copiarlo
+        self._read = read + 1
+        RING_INDEX.pack_into(buf, READ_OFFSET, self._read)
+        return puzzle
+
+    def _drain_wakeups(self):
+        reader = self._wake_reader
+        while reader.poll():
+            reader.recv_bytes()
+
+    """------------------------------------------- Ciclo de vida ------------------------------------------- """
+
+    def close(self):
+        """Desconecta este proceso del anillo"""
+        self._shm.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def unlink(self):
+        """Elimina el bloque de memoria compartida (sólo lo hace el MainServer)"""
+        self._shm.unlink()
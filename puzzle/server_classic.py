@@ -1,14 +1,47 @@
-import os
 import re
 import asyncio
+import logging
+import functools
+from queue import Empty
 
 from common.social import ServerClientMessages as SCM
 from common.social import PlayerServerMessages as PSM
 from common.social import MainServerMessages as SM
 from common.communication import Communication
-from puzzle.abstract_game_server import AbstractGameServer
+from puzzle.abstract_game_server import AbstractGameServer, PlayerState, PlayerStates, WRITE_BUFFER_HIGH, client_label
 from puzzle.logic import KryptoLogic
 
+# Prefijos y respuestas fijas del protocolo, codificados una sola vez
+_GAME_STATUS_B = f"{SCM.GAME_STATUS}|".encode()
+_NO_PUZZLE_B = f"{SCM.ERROR}|No puzzle available\n".encode()
+_INVALID_SOLUTION_B = f"{SCM.ERROR}|Invalid solution format\n".encode()
+_SOLUTION_CORRECT_B = f"{SCM.SOLUTION_CORRECT}\n".encode()
+_SOLUTION_INCORRECT_B = f"{SCM.SOLUTION_INCORRECT}\n".encode()
+_ALREADY_SUBMITTED_B = f"{SCM.SOLUTION_INCORRECT}|You already submitted for this puzzle\n".encode()
+_ALREADY_SURRENDERED_B = f"{SCM.SURRENDER_STATUS}|You already submitted for this puzzle\n".encode()
+_SURRENDER_OK_B = f"{SCM.SURRENDER_STATUS}|disable_input\n".encode()
+
+# Validación de soluciones: números de una o más cifras y operadores admitidos
+_NUMBER_RE = re.compile(r'\d+')
+_DROP_OPERATORS = str.maketrans('', '', '+-*.xX/:%')
+# Longitud posible de una solución: de "1+2*3-4" a cuatro números de dos cifras con espacios
+_SOLUTION_MIN_LEN = 7
+_SOLUTION_MAX_LEN = 32
+
+# Tiempo máximo para que un cliente con el búfer lleno lo vacíe antes de descartarlo
+DRAIN_TIMEOUT = 2.0
+
+# Búfer máximo de un cliente que ya se está vaciando: por encima se descarta sin esperar
+WRITE_BUFFER_MAX = 4 * WRITE_BUFFER_HIGH
+
+# Ventana en la que se agrupan los cambios de estadísticas en un único GAME_STATUS
+STATS_BATCH_DELAY = 0.02
+
+@functools.lru_cache(maxsize=4096)
+def verify_cached(solution, target):
+    """KryptoLogic.verify_solution memoizado: jugadores distintos suelen enviar la misma solución"""
+    return KryptoLogic.verify_solution(solution, target)
+
 class ClassicServer(AbstractGameServer):
     """Implementation of a classic game server"""
     
@@ -17,9 +50,22 @@ class ClassicServer(AbstractGameServer):
         self.mode = "classic"
         
          # Estructura unificada de tracking de jugadores
-        self.players = {}  # {client_id: {"username": name, "state": None|"correct"|"surrendered"}}
+        self.players = {}  # {(host, port): PlayerState}
+        self.state_counts = {PlayerStates.CORRECT: 0, PlayerStates.SURRENDERED: 0}  # Estados de los clientes conectados
         self.max_players = max_players
         
+        # Clientes con el búfer lleno que se están vaciando (ver broadcast_bytes)
+        self.draining = set()
+        self.drain_tasks = set()
+        
+        # Broadcast de estadísticas pendiente (ver schedule_game_stats)
+        self.stats_dirty = False
+        self.stats_flush_task = None
+        
+        # Últimas estadísticas enviadas y su mensaje ya codificado
+        self.last_stats = None
+        self.last_stats_b = b""
+        
         # Initialize Communication
         self.comm = Communication(logger=self.logger)
         
@@ -38,57 +84,62 @@ class ClassicServer(AbstractGameServer):
             PSM.GREETING: self.handle_greeting
         }
         self.comm.define_all_commands(handlers)
+        self.byte_commands = {command.encode(): handler for command, handler in handlers.items()}
     
     # Command handlers
     async def handle_get_puzzle(self, writer, *args):
         """Handle GET_PUZZLE command"""
-        client_id = self.get_client_id_from_writer(writer)
         if self.current_puzzle:
-            await self.comm.send_message_async(writer, f"{SCM.PUZZLE}|{self.current_puzzle}\n")
+            await self.comm.send_bytes_async(writer, self.puzzle_b)
         else:
-            await self.comm.send_message_async(writer, f"{SCM.ERROR}|No puzzle available\n")
+            await self.comm.send_bytes_async(writer, _NO_PUZZLE_B)
     
     async def handle_submit_solution(self, writer, *args):
         """Handle SUBMIT_SOLUTION command"""
         client_id = self.get_client_id_from_writer(writer)
         
         if not args:
-            await self.comm.send_message_async(writer, f"{SCM.ERROR}|Invalid solution format\n")
+            await self.comm.send_bytes_async(writer, _INVALID_SOLUTION_B)
             return
                 
         solution = str(args[0])
         
         # Inicializar datos del jugador si no existen
         if client_id not in self.players:
-            self.players[client_id] = {"username": client_id, "state": None}
+            self.players[client_id] = PlayerState(client_label(client_id))
         
         # Actualizar username si se proporcionó
         if len(args) > 1:
-            self.players[client_id]["username"] = args[1]
+            self.players[client_id].username = args[1]
         
-        username = self.players[client_id]["username"]
+        username = self.players[client_id].username
         
         # Verificar si el jugador ya ha contribuido al puzzle actual
-        if self.players[client_id]["state"] is not None:
-            self.logger.warning(f"Player {username} already submitted for this puzzle: {self.players[client_id]['state']}")
-            await self.comm.send_message_async(writer, f"{SCM.SOLUTION_INCORRECT}|You already submitted for this puzzle\n")
+        if self.players[client_id].state is not None:
+            self.logger.warning("Player %s already submitted for this puzzle: %s", username, self.players[client_id].state)
+            await self.comm.send_bytes_async(writer, _ALREADY_SUBMITTED_B)
             return
                 
-        # Validar solución
-        if self.validate_solution(solution):
+        # Validar solución: una solución mal formada cuenta como incorrecta
+        try:
+            correct = self.validate_solution(solution)
+        except Exception as e:
+            self.logger.error(f"Error validating solution {solution!r}: {e}")
+            correct = False
+            
+        if correct:
             # Enviar respuesta de correcto
-            await self.comm.send_message_async(writer, f"{SCM.SOLUTION_CORRECT}\n")
-            self.logger.info(f"Player {username} answered correctly")
+            await self.comm.send_bytes_async(writer, _SOLUTION_CORRECT_B)
+            self.logger.info("Player %s answered correctly", username)
             
             # Actualizar estado del jugador
-            self.players[client_id]["state"] = "correct"
+            self.set_player_state(client_id, PlayerStates.CORRECT)
             
             # Verificar estado del juego
-            await asyncio.sleep(0.5)
             if not await self.check_puzzle_completion_status():
-                await self.broadcast_game_stats()
+                self.schedule_game_stats()
         else:
-            await self.comm.send_message_async(writer, f"{SCM.SOLUTION_INCORRECT}\n")
+            await self.comm.send_bytes_async(writer, _SOLUTION_INCORRECT_B)
 
     async def handle_player_surrender(self, writer, *args):
         """Handle PLAYER_SURRENDER command"""
@@ -96,94 +147,92 @@ class ClassicServer(AbstractGameServer):
         
         # Inicializar datos del jugador si no existen
         if client_id not in self.players:
-            self.players[client_id] = {"username": client_id, "state": None}
+            self.players[client_id] = PlayerState(client_label(client_id))
         
         # Actualizar username si se proporcionó
         if args:
-            self.players[client_id]["username"] = args[0]
+            self.players[client_id].username = args[0]
         
-        username = self.players[client_id]["username"]
+        username = self.players[client_id].username
         
         # Verificar si el jugador ya ha contribuido al puzzle actual
-        if self.players[client_id]["state"] is not None:
-            self.logger.warning(f"Player {username} already submitted for this puzzle: {self.players[client_id]['state']}")
-            await self.comm.send_message_async(writer, f"{SCM.SURRENDER_STATUS}|You already submitted for this puzzle\n")
+        if self.players[client_id].state is not None:
+            self.logger.warning("Player %s already submitted for this puzzle: %s", username, self.players[client_id].state)
+            await self.comm.send_bytes_async(writer, _ALREADY_SURRENDERED_B)
             return
         
-        self.logger.info(f"Player {username} surrendered")
+        self.logger.info("Player %s surrendered", username)
         
         # Actualizar estado del jugador
-        self.players[client_id]["state"] = "surrendered"
+        self.set_player_state(client_id, PlayerStates.SURRENDERED)
         
         # Enviar confirmación de rendición
-        await self.comm.send_message_async(writer, f"{SCM.SURRENDER_STATUS}|disable_input\n")
+        await self.comm.send_bytes_async(writer, _SURRENDER_OK_B)
         
         # Verificar estado del juego
-        await asyncio.sleep(0.5)
         if not await self.check_puzzle_completion_status():
-            await self.broadcast_game_stats()
+            self.schedule_game_stats()
 
     async def handle_player_exit(self, writer, *args):
         """Handle PLAYER_EXIT command"""
         client_id = self.get_client_id_from_writer(writer)
         
         # Obtener username
-        username = client_id
+        username = client_label(client_id)
         if client_id in self.players:
             if args:  # Si se proporciona username en el mensaje
-                self.players[client_id]["username"] = args[0]
-            username = self.players[client_id]["username"]
+                self.players[client_id].username = args[0]
+            username = self.players[client_id].username
         
         state = "none"
         if client_id in self.players:
-            state = self.players[client_id].get("state", "none")
+            state = self.players[client_id].state or "none"
         
-        self.logger.info(f"Player {username} exited with state: {state}")
+        self.logger.info("Player %s exited with state: %s", username, state)
         
         if client_id in self.clients:
-            self.clients[client_id]["disconnected"] = True
-            
-            active_clients = {cid: data for cid, data in self.clients.items() 
-                             if cid != client_id and not data.get("disconnected", False)}
-                             
+            self.mark_client_disconnected(client_id)
             del self.clients[client_id]
             
-            if active_clients:
-                self.message_queue.put(f"{SM.PLAYER_EXIT}|{os.getpid()}")
-                await self.broadcast_game_stats()
-                await asyncio.sleep(0.5)
-                await self.check_puzzle_completion_status()
+            if self.active_count:
+                self.safe_queue_put(f"{SM.PLAYER_EXIT}|{self.pid}")
+                # Sin él puede que el resto ya haya terminado el puzzle
+                if not await self.check_puzzle_completion_status():
+                    self.schedule_game_stats()
             else:
                 self.logger.info("All players have disconnected")
-                self.message_queue.put(f"{SM.KILL_SERVER}|{os.getpid()}")
+                self.safe_queue_put(f"{SM.KILL_SERVER}|{self.pid}")
     
     async def handle_greeting(self, writer, *args):
         """Handle greeting (welcome) message from client"""
         client_id = self.get_client_id_from_writer(writer)
         
         # Si se proporcionó un nombre de usuario en el mensaje
-        username = args[0] if args else client_id
+        username = args[0] if args else client_label(client_id)
         
         # Actualizar el nombre de usuario en la estructura de jugadores
         if client_id not in self.players:
-            self.players[client_id] = {"username": username, "state": None}
+            self.players[client_id] = PlayerState(username)
         else:
-            self.players[client_id]["username"] = username
+            self.players[client_id].username = username
             
-        self.logger.info(f"Player {username} identified")
+        self.logger.info("Player %s identified", username)
 
-        await self.comm.send_message_async(writer, f"{SCM.PUZZLE}|{self.current_puzzle}\n")
+        await self.comm.send_bytes_async(writer, self.puzzle_b)
     
     def get_client_id_from_writer(self, writer):
         """Get client ID from writer object"""
-        addr = writer.get_extra_info('peername')
-        return f"{addr[0]}:{addr[1]}"
+        client_id = self.client_ids.get(writer)
+        if client_id is None:
+            # Writer que no pasó por handle_client_connection
+            client_id = writer.get_extra_info('peername')
+        return client_id
     
     def get_initial_puzzles(self):
         """Get initial puzzles for the classic mode - just one is enough"""
         try:
-            if not self.puzzle_queue.empty():
-                return [self.puzzle_queue.get()]
+            return [self.puzzle_queue.get_nowait()]
+        except Empty:
             return None
         except Exception as e:
             self.logger.error(f"Error getting initial puzzles: {e}")
@@ -191,14 +240,7 @@ class ClassicServer(AbstractGameServer):
     
     async def check_puzzle_completion_status(self):
         """Check if all players have completed the current puzzle and send new if needed"""
-        # Contar sólo clientes activos
-        active_clients = {cid: data for cid, data in self.clients.items() 
-                         if not data.get("disconnected", False)}
-        total_players = len(active_clients)
-        
-        # Calcular estadísticas a partir de los estados
-        correct_answers = sum(1 for cid in active_clients if cid in self.players and self.players[cid]["state"] == "correct")
-        surrendered = sum(1 for cid in active_clients if cid in self.players and self.players[cid]["state"] == "surrendered")
+        total_players, correct_answers, surrendered = self.game_stats()
         
         # Verificar si todos los jugadores han completado el puzzle
         if total_players > 0 and total_players <= correct_answers + surrendered:
@@ -207,109 +249,200 @@ class ClassicServer(AbstractGameServer):
             if new_puzzle:
                 self.logger.info(f"All players completed the puzzle. Sending new puzzle: {new_puzzle}")
                 self.current_puzzle = new_puzzle
+                verify_cached.cache_clear()  # Las soluciones del puzzle anterior ya no volverán a llegar
                 
                 # Resetear estados para el nuevo puzzle
-                for client_id in self.players:
-                    if client_id in active_clients:  # Solo para clientes conectados
-                        self.players[client_id]["state"] = None
+                for client_id in self.active_clients:  # Solo para clientes conectados
+                    if client_id in self.players:
+                        self.players[client_id].state = None
+                self.state_counts[PlayerStates.CORRECT] = self.state_counts[PlayerStates.SURRENDERED] = 0
                 
-                # Enviar nuevo puzzle a todos los clientes
-                await self.broadcast_message(f"{SCM.NEW_PUZZLE}|{new_puzzle}\n")
+                # Enviar nuevo puzzle y estadísticas reiniciadas a todos los clientes en una
+                # sola escritura: cada mensaje va en su línea, no hace falta separarlos con pausas
+                self.stats_dirty = False
+                await self.broadcast_bytes(self.new_puzzle_b, self.game_stats_payload())
                 
                 return True  # Puzzle actualizado
         
         return False  # No necesita nuevo puzzle    
     
-    async def broadcast_game_stats(self):
+    def game_stats(self):
+        """(players, correct, surrendered) for the connected clients"""
+        return (self.active_count, *self.count_player_states())
+
+    def game_stats_payload(self, stats=None):
+        """Encoded GAME_STATUS line with the current statistics
+
+        The line is only formatted again when the statistics differ from the last ones.
+        """
+        stats = stats or self.game_stats()
+        if stats != self.last_stats:
+            self.logger.debug("Game stats: Players=%d, Correct=%d, Surrendered=%d", *stats)
+            # Formatear mensaje de estado directamente en bytes
+            self.last_stats_b = _GAME_STATUS_B + b"%d|%d|%d\n" % stats
+            self.last_stats = stats
+        return self.last_stats_b
+
+    def count_player_states(self):
+        """(correct, surrendered) among the connected clients"""
+        return self.state_counts[PlayerStates.CORRECT], self.state_counts[PlayerStates.SURRENDERED]
+
+    def set_player_state(self, client_id, state):
+        """Change a player's state for the current puzzle, keeping state_counts in step"""
+        player = self.players[client_id]
+        if client_id in self.active_clients:
+            if player.state in self.state_counts:
+                self.state_counts[player.state] -= 1
+            if state in self.state_counts:
+                self.state_counts[state] += 1
+        player.state = state
+
+    def mark_client_disconnected(self, client_id):
+        """Mark a client as disconnected; its state no longer counts for the puzzle"""
+        if not super().mark_client_disconnected(client_id):
+            return False
+        player = self.players.get(client_id)
+        if player is not None and player.state in self.state_counts:
+            self.state_counts[player.state] -= 1
+        return True
+
+    def schedule_game_stats(self):
+        """Mark the statistics as changed and broadcast them after STATS_BATCH_DELAY
+
+        Every answer or surrender within the window is covered by the same
+        GAME_STATUS, instead of one broadcast to every client per event.
+        """
+        self.stats_dirty = True
+        if self.stats_flush_task is None or self.stats_flush_task.done():
+            self.stats_flush_task = asyncio.create_task(self.flush_game_stats())
+
+    async def flush_game_stats(self):
+        """Send the pending statistics, unless another broadcast already did or they did not change"""
+        await asyncio.sleep(STATS_BATCH_DELAY)
+        if not self.stats_dirty:
+            return
+        stats = self.game_stats()
+        if stats == self.last_stats:
+            self.stats_dirty = False  # Los clientes ya tienen estas cifras
+            return
+        await self.broadcast_game_stats(stats)
+
+    async def broadcast_game_stats(self, stats=None):
         """Broadcast current game statistics to all connected clients"""
+        self.stats_dirty = False
         try:
-            # Contar sólo clientes activos
-            active_clients = {cid: data for cid, data in self.clients.items() 
-                             if not data.get("disconnected", False)}
-            
-            total_players = len(active_clients)
-            
-            # Calcular estadísticas a partir de los estados
-            correct_answers = sum(1 for cid in active_clients if cid in self.players and self.players[cid]["state"] == "correct")
-            surrendered = sum(1 for cid in active_clients if cid in self.players and self.players[cid]["state"] == "surrendered")
-            
-            # Formatear mensaje de estado
-            message = f"{SCM.GAME_STATUS}|{total_players}|{correct_answers}|{surrendered}\n"
-            
-            self.logger.debug(f"Broadcasting stats: Players={total_players}, Correct={correct_answers}, Surrendered={surrendered}")
-            
             # Broadcast a todos los clientes
-            await self.broadcast_message(message)
+            await self.broadcast_bytes(self.game_stats_payload(stats))
             
         except Exception as e:
             self.logger.error(f"Failed to broadcast game stats: {e}")
             
     async def broadcast_message(self, message):
         """Send a message to all connected clients"""
-        try:
-            # Solo enviar mensaje a clientes que no están marcados como desconectados
-            active_clients = {cid: data for cid, data in self.clients.items() 
-                             if not data.get("disconnected", False)}
-            
-            if not active_clients:
-                return
-                
-            self.logger.debug(f"Broadcasting to {len(active_clients)} clients: {message[:50]}...")
-            
-            # Crear tareas de envío para todos los clientes y esperar que todas terminen
-            send_tasks = []
-            for client_id, client_data in active_clients.items():
-                writer = client_data.get("writer")
-                if writer and not writer.is_closing():
-                    # Crear tarea pero no esperar a que termine inmediatamente
-                    task = asyncio.create_task(self._send_to_client(client_id, writer, message))
-                    send_tasks.append(task)
-            
-            # Esperar a que todas las tareas terminen con timeout
-            if send_tasks:
-                await asyncio.wait(send_tasks, timeout=2.0)
+        # Codificar una sola vez para todos los destinatarios
+        await self.broadcast_bytes(message.encode())
+
+    async def broadcast_bytes(self, *parts: bytes):
+        """Send an already encoded message, given as one or more parts, to all connected clients"""
+        for client_id, writer in self.broadcast_sync(*parts):
+            # Los clientes que superan el límite del búfer se vacían en segundo plano:
+            # el handler que originó el broadcast no espera a los receptores lentos
+            if client_id not in self.draining:
+                self.draining.add(client_id)
+                task = asyncio.create_task(self.drain_or_drop(client_id, writer))
+                self.drain_tasks.add(task)
+                task.add_done_callback(self.drain_tasks.discard)
+            elif writer.transport.get_write_buffer_size() > WRITE_BUFFER_MAX:
+                # Sigue sin leer y el búfer no deja de crecer: no esperar al timeout
+                self.drop_client(client_id, writer, "write buffer full")
                 
-        except Exception as e:
-            self.logger.error(f"Error broadcasting message: {e}")
-    
-    async def _send_to_client(self, client_id, writer, message):
-        """Helper method to send a message to a specific client with error handling"""
+        # Un único punto de cesión para todo el broadcast, no uno por cliente
+        await asyncio.sleep(0)
+
+    async def drain_or_drop(self, client_id, writer):
+        """Wait for a backlogged client to empty its buffer, disconnecting it if it does not"""
         try:
-            await self.comm.send_message_async(writer, message)
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
         except Exception as e:
-            self.logger.error(f"Failed to send to client {client_id}: {e}")
-            # Marcar como desconectado si hay error
-            if client_id in self.clients:
-                self.clients[client_id]["disconnected"] = True
+            self.drop_client(client_id, writer, repr(e))
+        finally:
+            self.draining.discard(client_id)
+
+    def drop_client(self, client_id, writer, reason):
+        """Disconnect a client that is not reading what it is sent"""
+        if self.mark_client_disconnected(client_id):
+            self.logger.warning("Client %s is not reading (%s), disconnecting it", client_label(client_id), reason)
+        writer.close()
+
+    def broadcast_sync(self, *parts: bytes):
+        """Write a message to every connected client without waiting for drain()
+
+        The transport buffers whatever the socket does not take at once; a slow
+        client only grows its own buffer instead of holding up the game. A message
+        in several parts goes out with writelines(), which lets the transport send
+        them together without joining them first. Returns the (client_id, writer)
+        pairs whose buffer went past WRITE_BUFFER_HIGH; the list is only built
+        when there is one, so the usual broadcast allocates nothing.
+        """
+        payload = parts[0] if len(parts) == 1 else None
+        sent = 0
+        backlogged = None
+        failed = None
+        for client_id, client_data in self.active_clients.items():
+            writer = client_data.writer
+            if not writer or writer.is_closing():
+                continue
+            try:
+                if payload is None:
+                    writer.writelines(parts)
+                else:
+                    writer.write(payload)
+                sent += 1
+                if writer.transport.get_write_buffer_size() > WRITE_BUFFER_HIGH:
+                    if backlogged is None:
+                        backlogged = []
+                    backlogged.append((client_id, writer))
+            except Exception as e:
+                self.logger.error("Failed to send to client %s: %s", client_label(client_id), e)
+                if failed is None:
+                    failed = []
+                failed.append(client_id)
+
+        # Marcar como desconectados los que fallaron, ya fuera del recorrido de active_clients
+        if failed:
+            for client_id in failed:
+                self.mark_client_disconnected(client_id)
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Broadcast to %d clients: %r...", sent, parts[0][:50])
+        return backlogged or ()
             
     def validate_solution(self, solution: str):
         """Validate a solution against the current puzzle
         
         In a complete implementation, this would verify the solution against the puzzle.
-        For now we'll check basic formatting and validity.
+        For now we'll check basic formatting and validity. A malformed solution can
+        make KryptoLogic raise; the caller decides how to report that.
         """
-        try:
-            if not self.current_puzzle:
-                return False
-            
-            # Extract numbers and operations from the solution
-            numbers = [int(s) for s in re.findall(r'\d+', solution)]
-            operations = [s for s in solution if s in '+-*.xX/:%']
-            
-            # Check if the solution uses exactly 4 numbers and 3 operations
-            if len(numbers) != 4 or len(operations) != 3:
-                return False
-            
-            # Check if the numbers used are the same as in the puzzle
-            puzzle_numbers = self.current_puzzle[0:4]
-            for num in numbers:
-                if num not in puzzle_numbers:
-                    return False
-                puzzle_numbers.remove(num)
-            
-            # Validate solution using logic module
-            return KryptoLogic.verify_solution(solution, self.current_puzzle[-1])
-            
-        except Exception as e:
-            self.logger.error(f"Error validating solution: {e}")
+        if not self.current_puzzle:
+            return False
+        
+        # Descartar sin recorrerla una cadena que no puede ser una solución
+        if not _SOLUTION_MIN_LEN <= len(solution) <= _SOLUTION_MAX_LEN:
+            return False
+        
+        # Check if the solution uses exactly 3 operations (counted in C by deleting them)
+        if len(solution) - len(solution.translate(_DROP_OPERATORS)) != 3:
+            return False
+        
+        # Check if the solution uses exactly 4 numbers
+        numbers = _NUMBER_RE.findall(solution)
+        if len(numbers) != 4:
+            return False
+        
+        # Check if the numbers used are the same as in the puzzle (both sides sorted)
+        if sorted(map(int, numbers)) != self.puzzle_cards:
             return False
+        
+        # Validate solution using logic module
+        return verify_cached(solution, self.puzzle_target)
@@ -1,11 +1,15 @@
 import logging
 import asyncio
 import time
+from queue import Empty
 from common.social import ServerClientMessages as SCM
-from puzzle.abstract_game_server import AbstractGameServer
+from puzzle.abstract_game_server import AbstractGameServer, client_label
 
 class CompetitiveServer(AbstractGameServer):
     """Implementation of a competitive game server"""
+
+    # Clientes a los que se escribe seguidos antes de ceder el event loop en un broadcast
+    BROADCAST_BATCH_SIZE = 50
     
     def __init__(self, name, port, puzzle_queue, message_queue):
         super().__init__(name, port, puzzle_queue, message_queue)
@@ -25,8 +29,10 @@ class CompetitiveServer(AbstractGameServer):
             puzzles = []
             # Try to get 5 puzzles
             for _ in range(5):
-                if not self.puzzle_queue.empty():
-                    puzzles.append(self.puzzle_queue.get())
+                try:
+                    puzzles.append(self.puzzle_queue.get_nowait())
+                except Empty:
+                    break
                     
             return puzzles if puzzles else None
         except Exception as e:
@@ -133,18 +139,49 @@ class CompetitiveServer(AbstractGameServer):
     async def send_message_to_client(self, client_id, message):
         """Send a message to a specific client"""
         if client_id in self.clients:
-            writer = self.clients[client_id]["writer"]
+            writer = self.clients[client_id].writer
             writer.write(message.encode())
             await writer.drain()
-            self.logger.debug(f"Sent to {client_id}: {message}")
+            self.logger.debug("Sent to %s: %s", client_id, message)
             
     async def broadcast_message(self, message):
         """Send a message to all connected clients"""
-        for client_id, client_data in self.clients.items():
-            writer = client_data["writer"]
-            writer.write(message.encode())
-            await writer.drain()
-        self.logger.debug(f"Broadcast: {message}")
+        payload = message.encode()
+        batch_size = self.BROADCAST_BATCH_SIZE
+        # Con pocos clientes se escribe a todos sin ceder el loop. Con muchos se cede
+        # entre lotes, así que se recorre una copia: active_clients puede cambiar entretanto
+        clients = self.active_clients.items()
+        total = len(clients)
+        if total > batch_size:
+            clients = list(clients)
+        backlogged = []
+        dead = []
+        for i, (client_id, client_data) in enumerate(clients, 1):
+            if client_data.disconnected:
+                continue  # Se desconectó mientras se cedía el loop
+            writer = client_data.writer
+            try:
+                writer.write(payload)
+                # Sólo hace falta esperar a los que el socket no ha vaciado por debajo
+                # de su marca baja; para el resto drain() no tendría nada que esperar
+                transport = writer.transport
+                if transport.get_write_buffer_size() > transport.get_write_buffer_limits()[0]:
+                    backlogged.append((client_id, writer))
+            except Exception as e:
+                self.logger.error("Failed to send to client %s: %s", client_label(client_id), e)
+                dead.append(client_id)
+            if i % batch_size == 0 and i < total:
+                await asyncio.sleep(0)  # Sólo entre lotes, nunca sobre la vista del dict
+        for client_id in dead:
+            self.mark_client_disconnected(client_id)
+        # Una única espera para los rezagados; quien falle al vaciar (p. ej. ConnectionResetError)
+        # se marca como desconectado y su bucle de lectura hace la limpieza
+        results = await asyncio.gather(*(writer.drain() for _, writer in backlogged), return_exceptions=True)
+        for (client_id, _), result in zip(backlogged, results):
+            if isinstance(result, Exception):
+                self.logger.warning("Client %s failed to drain: %r", client_label(client_id), result)
+                self.mark_client_disconnected(client_id)
+        self.logger.debug("Broadcast: %s", message)
             
     def validate_solution(self, solution):
         """Validate a solution (simplified implementation)"""
@@ -2,6 +2,7 @@ import os
 import socket
 import multiprocessing
 from queue import Queue
+from multiprocessing.connection import Connection
 
 from common.logger import Logger
 from common.social import MainServerMessages as SM
@@ -15,18 +16,17 @@ logger = Logger.get("ServerFactory", True)
 class ServerFactory:
     """Factory class for creating different types of game servers"""
     
-    def __init__(self, host, puzzle_queue:Queue, message_queue:Queue, debug=False):
+    def __init__(self, host, message_queue:Connection, debug=False):
         """Initialize the server factory"""
         self.host = host 
-        self.puzzle_queue = puzzle_queue
         self.message_queue = message_queue
         self.next_port = 5001
         self.debug = debug
         
         logger.info(f"Server factory initialized on host: {host}")
     
-    def create_server(self, name, mode, max_players):
-        """Create a new server of the specified type"""
+    def create_server(self, name, mode, max_players, puzzle_queue:Queue):
+        """Create a new server of the specified type, fed by its own puzzle queue"""
         try:
             # Determine if host is IPv4 or IPv6
             host_is_ipv6 = ':' in self.host
@@ -43,7 +43,7 @@ class ServerFactory:
             # Create the server in a new process - pasar el host
             process = multiprocessing.Process(
                 target=self._start_game_server,
-                args=(name, mode, max_players, self.host, port, self.puzzle_queue, self.message_queue, self.debug)
+                args=(name, mode, max_players, self.host, port, puzzle_queue, self.message_queue, self.debug)
             )
             process.daemon = True
             process.start()
@@ -111,12 +111,19 @@ class ServerFactory:
             else:
                 use_ipv6 = NetworkManager.is_ipv6_available()
             
-            # Iniciar el servidor con la configuración adecuada
+            # Iniciar el servidor con la configuración adecuada.
+            # uvloop es opcional: si está instalado sustituye al event loop por defecto
             import asyncio
-            asyncio.run(server.start(host))
+            try:
+                import uvloop
+                loop_factory = uvloop.new_event_loop
+            except ImportError:
+                loop_factory = None
+            with asyncio.Runner(loop_factory=loop_factory) as runner:
+                runner.run(server.start(host))
             
         except Exception as e:
             # Log and notify main server of error with proper format
             logger.error(f"Error in game server: {e}")
-            message_queue.put(f"{SM.ERROR}|{os.getpid()}|{str(e)}")
+            message_queue.send(f"{SM.ERROR}|{os.getpid()}|{str(e)}")
 
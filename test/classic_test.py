@@ -1,15 +1,19 @@
 import unittest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock, AsyncMock, call
 import asyncio
-from queue import Queue
+from queue import Queue, Empty
 
-from puzzle.server_classic import ClassicServer
+from puzzle.server_classic import ClassicServer, verify_cached
+from puzzle.abstract_game_server import ClientConn, PlayerState
 from common.social import ServerClientMessages as SCM
 from common.social import PlayerServerMessages as PSM
 
 class TestClassicServer(unittest.TestCase):
 
     def setUp(self):
+        # Results memoized in other tests may come from a patched verify_solution
+        verify_cached.cache_clear()
+        
         # Mock queues for testing
         self.puzzle_queue = MagicMock(spec=Queue)
         self.message_queue = MagicMock(spec=Queue)
@@ -82,6 +86,13 @@ class TestClassicServer(unittest.TestCase):
         self.server.current_puzzle = [1,2,3,4,5]
 
     
+    def test_validate_solution_length_bounds(self):
+        """Test strings too short or too long to be a solution are rejected before parsing"""
+        with patch('puzzle.logic.KryptoLogic.verify_solution') as mock_verify:
+            self.assertFalse(self.server.validate_solution("1+2"))
+            self.assertFalse(self.server.validate_solution("1+2*3-4" + " " * 40))
+            mock_verify.assert_not_called()
+
     def test_validate_solution_no_puzzle(self):
         """Test validate_solution with no puzzle set"""
         self.server.current_puzzle = None
@@ -89,6 +100,13 @@ class TestClassicServer(unittest.TestCase):
         # Any solution should fail with no puzzle
         self.assertFalse(self.server.validate_solution("1+2+3-4"))
         
+    def test_validate_solution_memoized(self):
+        """Test the same solution for the same target is only verified once"""
+        with patch('puzzle.logic.KryptoLogic.verify_solution', return_value=True) as verify:
+            self.assertTrue(self.server.validate_solution("4+1*3-2"))
+            self.assertTrue(self.server.validate_solution("4+1*3-2"))
+        verify.assert_called_once_with("4+1*3-2", 5)
+
     def test_validate_solution_double_digit_numbers(self):
         """Test validate_solution with double digit numbers"""
         self.server.current_puzzle = [10,11,0,4,25]
@@ -97,5 +115,227 @@ class TestClassicServer(unittest.TestCase):
         with patch('puzzle.logic.KryptoLogic.verify_solution', return_value=True):
             self.assertTrue(self.server.validate_solution("10+11+4-0"))
 
+    # Tests for broadcasts
+    def make_client(self, client_id, state=None):
+        """Register a connected client with a mocked writer"""
+        writer = MagicMock()
+        writer.is_closing.return_value = False
+        writer.drain = AsyncMock()
+        writer.transport.get_write_buffer_size.return_value = 0
+        self.server.clients[client_id] = self.server.active_clients[client_id] = ClientConn(MagicMock(), writer, 0)
+        self.server.players[client_id] = PlayerState(client_id)
+        self.server.set_player_state(client_id, state)
+        return writer
+
+    def test_broadcast_game_stats(self):
+        """Test broadcast_game_stats sends the same encoded stats to every client"""
+        writers = [self.make_client(("a", 1), "correct"), self.make_client(("b", 2)), self.make_client(("c", 3), "surrendered")]
+
+        asyncio.run(self.server.broadcast_game_stats())
+
+        for writer in writers:
+            writer.write.assert_called_once_with(f"{SCM.GAME_STATUS}|3|1|1\n".encode())
+
+    def test_puzzle_completion_sends_puzzle_and_stats_together(self):
+        """Test a completed puzzle sends NEW_PUZZLE and the reset stats in one write"""
+        self.server.get_next_puzzle = MagicMock(return_value=[4, 7, 3, 6, 2])
+        writers = [self.make_client(("a", 1), "correct"), self.make_client(("b", 2), "surrendered")]
+
+        self.assertTrue(asyncio.run(self.server.check_puzzle_completion_status()))
+
+        expected = f"{SCM.NEW_PUZZLE}|[4, 7, 3, 6, 2]\n{SCM.GAME_STATUS}|2|0|0\n".encode()
+        for writer in writers:
+            writer.write.assert_not_called()
+            writer.writelines.assert_called_once()
+            self.assertEqual(b"".join(writer.writelines.call_args.args[0]), expected)
+        self.assertEqual(self.server.current_puzzle, [4, 7, 3, 6, 2])
+
+    def test_stats_changes_are_batched(self):
+        """Test an answer and a surrender in quick succession produce a single GAME_STATUS"""
+        writers = {cid: self.make_client(cid) for cid in (("a", 1), ("b", 2), ("c", 3))}
+        for cid, writer in writers.items():
+            self.server.client_ids[writer] = cid
+
+        async def play():
+            with patch('puzzle.logic.KryptoLogic.verify_solution', return_value=True):
+                await self.server.handle_submit_solution(writers[("a", 1)], "1+2+3+4")
+            await self.server.handle_player_surrender(writers[("b", 2)])
+            await self.server.stats_flush_task
+
+        asyncio.run(play())
+
+        prefix = f"{SCM.GAME_STATUS}|".encode()
+        for writer in writers.values():
+            sent_stats = [c for c in writer.write.call_args_list if c.args[0].startswith(prefix)]
+            self.assertEqual(sent_stats, [call(prefix + b"3|1|1\n")])
+
+    def test_unchanged_stats_are_not_sent_again(self):
+        """Test a pending stats flush is dropped when the figures match the last broadcast"""
+        writer = self.make_client(("a", 1))
+
+        async def flush_twice():
+            await self.server.broadcast_game_stats()
+            self.server.schedule_game_stats()
+            await self.server.stats_flush_task
+
+        asyncio.run(flush_twice())
+
+        writer.write.assert_called_once_with(f"{SCM.GAME_STATUS}|1|0|0\n".encode())
+        self.assertFalse(self.server.stats_dirty)
+
+    def test_broadcast_drops_backlogged_client(self):
+        """Test a client whose buffer stays over the limit is disconnected, the rest are not"""
+        reading = self.make_client(("a", 1))
+        stuck = self.make_client(("b", 2))
+        stuck.transport.get_write_buffer_size.return_value = 2 ** 21
+        stuck.drain = AsyncMock(side_effect=ConnectionResetError)
+
+        async def broadcast():
+            await self.server.broadcast_bytes(b"ping\n")
+            self.assertEqual(len(self.server.drain_tasks), 1)  # The broadcast does not wait for it
+            await asyncio.gather(*self.server.drain_tasks)
+
+        asyncio.run(broadcast())
+
+        reading.write.assert_called_once_with(b"ping\n")
+        reading.drain.assert_not_called()
+        self.assertFalse(self.server.clients[("a", 1)].disconnected)
+        self.assertTrue(self.server.clients[("b", 2)].disconnected)
+        stuck.close.assert_called_once()
+        self.assertFalse(self.server.draining)
+
+    def test_next_puzzle_never_waits_on_queue(self):
+        """Test an empty puzzle queue falls back to a puzzle instead of blocking"""
+        self.server.message_queue = MagicMock()
+        self.puzzle_queue.get_nowait.side_effect = Empty
+        self.assertEqual(self.server.get_next_puzzle(), [4, 7, 3, 6, 2])
+        self.puzzle_queue.get.assert_not_called()
+
+        self.puzzle_queue.get_nowait.side_effect = None
+        self.puzzle_queue.get_nowait.return_value = [1, 1, 1, 1, 4]
+        self.assertEqual(self.server.get_next_puzzle(), [1, 1, 1, 1, 4])
+        self.server.message_queue.send.assert_called_once()
+
+    def test_player_exit_updates_active_count(self):
+        """Test a player leaving is removed once and the rest get the updated stats"""
+        leaving = self.make_client(("a", 1))
+        staying = self.make_client(("b", 2))
+        self.server.client_ids[leaving] = ("a", 1)
+        self.server.message_queue = MagicMock()  # Pipe connection to the main server
+
+        async def leave():
+            await self.server.handle_player_exit(leaving)
+            await self.server.stats_flush_task
+
+        asyncio.run(leave())
+
+        self.assertEqual(self.server.active_count, 1)
+        self.assertNotIn(("a", 1), self.server.clients)
+        self.assertFalse(self.server.mark_client_disconnected(("a", 1)))
+        staying.write.assert_called_once_with(f"{SCM.GAME_STATUS}|1|0|0\n".encode())
+
+    def test_disconnect_removes_player_state_from_counts(self):
+        """Test a disconnected player's answer stops counting towards the puzzle"""
+        self.make_client(("a", 1), "correct")
+        self.make_client(("b", 2), "surrendered")
+        self.assertEqual(self.server.count_player_states(), (1, 1))
+
+        self.server.mark_client_disconnected(("a", 1))
+
+        self.assertEqual(self.server.game_stats(), (1, 0, 1))
+
+    # Tests for command replies
+    def test_get_puzzle_reply(self):
+        """Test GET_PUZZLE answers with the current puzzle as a single encoded line"""
+        writer = self.make_client(("a", 1))
+        self.server.client_ids[writer] = ("a", 1)
+
+        asyncio.run(self.server.handle_get_puzzle(writer))
+
+        writer.write.assert_called_once_with(f"{SCM.PUZZLE}|[1, 2, 3, 4, 5]\n".encode())
+
+    def test_greeting_without_username_uses_peername(self):
+        """Test clients are keyed by the peername tuple and named after it by default"""
+        writer = MagicMock()
+        writer.write = MagicMock()
+        writer.drain = AsyncMock()
+        writer.get_extra_info.return_value = ("127.0.0.1", 5000)
+
+        asyncio.run(self.server.handle_greeting(writer))
+
+        self.assertEqual(self.server.players[("127.0.0.1", 5000)].username, "127.0.0.1:5000")
+
+    def test_surrender_without_username_uses_peername(self):
+        """Test a player first seen on surrender is named "host:port", not after the raw tuple"""
+        writer = MagicMock()
+        writer.write = MagicMock()
+        writer.drain = AsyncMock()
+        writer.get_extra_info.return_value = ("127.0.0.1", 5000)
+
+        asyncio.run(self.server.handle_player_surrender(writer))
+
+        self.assertEqual(self.server.players[("127.0.0.1", 5000)].username, "127.0.0.1:5000")
+
+    def test_malformed_solution_reply(self):
+        """Test a solution KryptoLogic cannot parse is answered as incorrect"""
+        writer = self.make_client(("a", 1))
+        self.server.client_ids[writer] = ("a", 1)
+
+        with self.assertRaises(ValueError):
+            self.server.validate_solution("+1 2+3*4")
+        asyncio.run(self.server.handle_submit_solution(writer, "+1 2+3*4"))
+
+        writer.write.assert_called_once_with(f"{SCM.SOLUTION_INCORRECT}\n".encode())
+        self.assertIsNone(self.server.players[("a", 1)].state)
+
+    def test_read_loop_dispatches_raw_commands(self):
+        """Test commands read from the socket reach their handlers with decoded arguments"""
+        writer = self.make_client(("a", 1))
+        writer.wait_closed = AsyncMock()
+        self.server.client_ids[writer] = ("a", 1)
+        self.server.message_queue = MagicMock()  # Pipe connection to the main server
+        self.server.handle_submit_solution = AsyncMock()
+        self.server.byte_commands[SCM.SUBMIT_SOLUTION.encode()] = self.server.handle_submit_solution
+
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(f"{SCM.GET_PUZZLE}\n{SCM.SUBMIT_SOLUTION}|1+2+3-4|ana\n".encode())
+            reader.feed_eof()
+            await self.server.handle_player_message(reader, writer, ("a", 1))
+
+        asyncio.run(read())
+
+        writer.write.assert_any_call(f"{SCM.PUZZLE}|[1, 2, 3, 4, 5]\n".encode())
+        self.server.handle_submit_solution.assert_awaited_once_with(writer, "1+2+3-4", "ana")
+
+    def test_surrender_twice_reply(self):
+        """Test a second surrender on the same puzzle gets the fixed rejection reply"""
+        writer = self.make_client(("a", 1), "surrendered")
+        self.server.client_ids[writer] = ("a", 1)
+
+        asyncio.run(self.server.handle_player_surrender(writer, "alice"))
+
+        writer.write.assert_called_once_with(f"{SCM.SURRENDER_STATUS}|You already submitted for this puzzle\n".encode())
+
+    def test_broadcast_drops_client_over_buffer_max(self):
+        """Test a client already draining is dropped at once when its buffer keeps growing"""
+        stuck = self.make_client(("a", 1))
+        stuck.transport.get_write_buffer_size.return_value = 2 ** 23
+        async def never_drains():
+            await asyncio.sleep(10)
+        stuck.drain = never_drains
+
+        async def broadcast_twice():
+            await self.server.broadcast_bytes(b"ping\n")
+            self.assertFalse(self.server.clients[("a", 1)].disconnected)  # First time it is given a chance
+            await self.server.broadcast_bytes(b"ping\n")
+            self.assertTrue(self.server.clients[("a", 1)].disconnected)
+            for task in self.server.drain_tasks:
+                task.cancel()
+
+        asyncio.run(broadcast_twice())
+
+        stuck.close.assert_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+import asyncio
+
+from puzzle.server_competitive import CompetitiveServer
+from puzzle.abstract_game_server import ClientConn
+
+class TestCompetitiveServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CompetitiveServer("Test", 5002, MagicMock(), MagicMock())
+
+        # Disable logging
+        self.server.logger.disabled = True
+
+    def tearDown(self):
+        self.server = None
+
+    def make_clients(self, count):
+        """Register count connected clients whose writers never back up"""
+        writers = []
+        for i in range(count):
+            writer = MagicMock()
+            writer.drain = AsyncMock()
+            writer.transport.get_write_buffer_size.return_value = 0
+            writer.transport.get_write_buffer_limits.return_value = (0, 0)
+            self.server.clients[("a", i)] = self.server.active_clients[("a", i)] = ClientConn(MagicMock(), writer, 0)
+            writers.append(writer)
+        return writers
+
+    async def broadcast_while_disconnecting(self, client_id):
+        """Broadcast while another task disconnects client_id as soon as the loop is yielded"""
+        asyncio.get_running_loop().call_soon(self.server.mark_client_disconnected, client_id)
+        await self.server.broadcast_message("x\n")
+
+    # Tests for broadcast_message
+    def test_broadcast_batch_size_clients_with_disconnect(self):
+        """Test a broadcast to exactly one batch survives a client leaving meanwhile"""
+        writers = self.make_clients(CompetitiveServer.BROADCAST_BATCH_SIZE)
+
+        asyncio.run(self.broadcast_while_disconnecting(("a", 10)))
+
+        # Un único lote no cede el loop: todos reciben el mensaje antes de la desconexión
+        self.assertTrue(all(writer.write.called for writer in writers))
+        self.assertNotIn(("a", 10), self.server.active_clients)
+
+    def test_broadcast_skips_client_disconnected_between_batches(self):
+        """Test a client that leaves while the loop is yielded between batches is skipped"""
+        batch_size = CompetitiveServer.BROADCAST_BATCH_SIZE
+        writers = self.make_clients(batch_size + 10)
+
+        asyncio.run(self.broadcast_while_disconnecting(("a", batch_size + 5)))
+
+        self.assertFalse(writers[batch_size + 5].write.called)
+        self.assertEqual(sum(writer.write.called for writer in writers), batch_size + 9)
+
+    def test_broadcast_drops_client_whose_drain_fails(self):
+        """Test a backlogged client that fails to drain is marked as disconnected"""
+        ok, failing = self.make_clients(2)
+        failing.transport.get_write_buffer_size.return_value = 10
+        failing.drain = AsyncMock(side_effect=ConnectionResetError)
+
+        asyncio.run(self.server.broadcast_message("x\n"))
+
+        ok.drain.assert_not_called()
+        self.assertEqual(list(self.server.active_clients), [("a", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -95,6 +95,8 @@ class TestLogic(unittest.TestCase):
 
     def test_12_verify_solution_false(self):
         self.assertFalse(KryptoLogic.verify_solution("1+2*3-4", 4))
+        # Una división no exacta invalida la solución en lugar de fallar
+        self.assertFalse(KryptoLogic.verify_solution("6/4+1+2", 5))
         
     @patch('puzzle.logic.KryptoLogic.solucionar_puzzle')
     def test_13_generate_puzzle_normal(self, mock_solucionar_puzzle):
@@ -0,0 +1,52 @@
+import unittest
+import logging
+import struct
+
+from puzzle.main_server import MainServer
+from common.social import MainServerMessages as SM
+
+
+class TestServerPipe(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MainServer()
+        self.server.message_logger = logging.getLogger("message_listener")
+        self.server.message_logger.disabled = True
+        self.server.pipe_buffer = bytearray()
+
+    def tearDown(self):
+        self.server.message_pipe.close()
+        self.server.server_pipe.close()
+
+    def received(self):
+        """Messages already decoded into server_messages"""
+        messages = []
+        while not self.server.server_messages.empty():
+            messages.append(self.server.server_messages.get_nowait())
+        return messages
+
+    def test_01_valid_frames(self):
+        self.server.server_pipe.send(f"{SM.OK}|1")
+        self.server.server_pipe.send(f"{SM.KILL_SERVER}|2")
+        self.server.on_server_message()
+        self.assertEqual(self.received(), [f"{SM.OK}|1", f"{SM.KILL_SERVER}|2"])
+        self.assertEqual(self.server.pipe_buffer, b"")
+
+    def test_02_corrupt_frame_keeps_following_ones(self):
+        # Un frame con longitud correcta pero contenido que no es pickle
+        self.server.server_pipe.send_bytes(b"not a pickle")
+        self.server.server_pipe.send(f"{SM.OK}|1")
+        self.server.on_server_message()
+        self.assertEqual(self.received(), [f"{SM.OK}|1"])
+        self.assertEqual(self.server.pipe_buffer, b"")
+
+    def test_03_corrupt_header_drops_chunk(self):
+        self.server.pipe_buffer += struct.pack("!i", -1)
+        self.server.server_pipe.send(f"{SM.OK}|1")
+        self.server.on_server_message()
+        self.assertEqual(self.received(), [])
+        self.assertEqual(self.server.pipe_buffer, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import multiprocessing
+from queue import Empty, Full
+
+from puzzle.puzzle_ring import PuzzleRing
+
+
+def consume_puzzles(ring, count, results):
+    """Consumidor en otro proceso: devuelve lo leído del anillo por una cola normal"""
+    for _ in range(count):
+        results.put(ring.get(timeout=5))
+
+
+class TestPuzzleRing(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = PuzzleRing(capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def test_01_fifo(self):
+        puzzles = [[1, 2, 3, 4, 5], [12, 11, 10, 9, 8], [6, 6, 6, 6, 1]]
+        for puzzle in puzzles:
+            self.ring.put_nowait(puzzle)
+        self.assertEqual(self.ring.qsize(), 3)
+        self.assertEqual([self.ring.get() for _ in puzzles], puzzles)
+        self.assertTrue(self.ring.empty())
+
+    def test_02_full(self):
+        for _ in range(4):
+            self.ring.put_nowait([1, 2, 3, 4, 5])
+        with self.assertRaises(Full):
+            self.ring.put_nowait([1, 2, 3, 4, 5])
+
+        # Al consumir uno se libera su hueco y el índice da la vuelta
+        self.ring.get_nowait()
+        self.ring.put_nowait([7, 7, 7, 7, 7])
+        self.assertEqual([self.ring.get_nowait() for _ in range(4)][-1], [7, 7, 7, 7, 7])
+
+    def test_03_empty(self):
+        with self.assertRaises(Empty):
+            self.ring.get_nowait()
+        with self.assertRaises(Empty):
+            self.ring.get(timeout=0.05)
+
+    def test_04_other_process(self):
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        process = ctx.Process(target=consume_puzzles, args=(self.ring, 6, results))
+        process.start()
+        try:
+            # Más puzzles que huecos: el consumidor tiene que ir liberándolos
+            for i in range(6):
+                while True:
+                    try:
+                        self.ring.put_nowait([i, i, i, i, i])
+                        break
+                    except Full:
+                        pass
+            self.assertEqual([results.get(timeout=5) for _ in range(6)], [[i] * 5 for i in range(6)])
+        finally:
+            process.join(timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()